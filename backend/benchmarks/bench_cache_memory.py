@@ -0,0 +1,107 @@
+"""Bytes por imagem retidos pelo cache em memória: lista de ImageSource vs CompactImage.
+
+Usa os adapters reais (Pexels e Getty) sobre um transporte HTTP simulado e mede duas origens:
+páginas recém-buscadas e páginas recarregadas do MongoDB (decodificadas de BSON, onde cada
+string vira uma cópia nova).
+
+Uso (a partir de backend/): python benchmarks/bench_cache_memory.py [--pages 40] [--per-page 50]
+"""
+import argparse
+import asyncio
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('PEXELS_API_KEY', 'benchmark')
+os.environ.setdefault('GETTY_IMAGES_API_KEY', 'benchmark')
+
+import bson  # noqa: E402
+import httpx  # noqa: E402
+from schemas import ImageSource  # noqa: E402
+from services.compact_records import CompactImage, pack_images  # noqa: E402
+from services.getty_service import getty_service  # noqa: E402
+from services.http_client import http_client  # noqa: E402
+from services.pexels_service import pexels_service  # noqa: E402
+
+
+def pexels_payload(page: int, per_page: int) -> dict:
+    photos = []
+    for i in range(per_page):
+        photo_id = page * 1000 + i
+        base = f"https://images.pexels.com/photos/{photo_id}/pexels-photo-{photo_id}.jpeg"
+        photos.append({
+            'id': photo_id,
+            'url': f"https://www.pexels.com/photo/foto-de-teste-{photo_id}/",
+            'photographer': f"Fotógrafo {i % 12}",
+            'photographer_url': f"https://www.pexels.com/@fotografo-{i % 12}",
+            'src': {'original': base, 'medium': f"{base}?auto=compress&cs=tinysrgb&h=350",
+                    'tiny': f"{base}?auto=compress&cs=tinysrgb&dpr=1&fit=crop&h=200&w=280"}
+        })
+    return {'photos': photos}
+
+
+def getty_payload(page: int, per_page: int) -> dict:
+    return {'images': [{
+        'id': str(page * 1000 + i),
+        'title': f"Imagem editorial {page * 1000 + i}",
+        'caption': 'Legenda da imagem usada apenas no benchmark de memória do cache',
+        'display_sizes': [{'uri': f"https://media.gettyimages.com/id/{page * 1000 + i}/photo/teste.jpg?s=612x612"}]
+    } for i in range(per_page)]}
+
+
+def handler(request: httpx.Request) -> httpx.Response:
+    page = int(request.url.params.get('page', 1))
+    per_page = int(request.url.params.get('per_page') or request.url.params.get('page_size') or 50)
+    if 'pexels' in request.url.host:
+        return httpx.Response(200, json=pexels_payload(page, per_page))
+    return httpx.Response(200, json=getty_payload(page, per_page))
+
+
+async def retained(build) -> float:
+    """Bytes por imagem que continuam vivos depois de build() (o lixo temporário não conta)"""
+    gc.collect()
+    before = tracemalloc.get_traced_memory()[0]
+    pages = await build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0] - before
+    count = sum(len(page) for page in pages)
+    del pages
+    return size / count
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, default=40)
+    parser.add_argument('--per-page', type=int, default=50)
+    args = parser.parse_args()
+
+    http_client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    tracemalloc.start()
+    print(f"{args.pages} páginas x {args.per_page} imagens, bytes por imagem em cache")
+    for name, service in (('pexels', pexels_service), ('getty_images', getty_service)):
+        async def fetch():
+            return [await service.search_images('teste', page, args.per_page) for page in range(1, args.pages + 1)]
+
+        async def fetch_compact():
+            return [pack_images(page) for page in await fetch()]
+
+        stored = [bson.encode({'images': [image.model_dump() for image in page]}) for page in await fetch()]
+
+        async def load():
+            return [[ImageSource(**item) for item in bson.decode(raw)['images']] for raw in stored]
+
+        async def load_compact():
+            return [[CompactImage.from_dict(item) for item in bson.decode(raw)['images']] for raw in stored]
+
+        fresh, fresh_compact = await retained(fetch), await retained(fetch_compact)
+        loaded, loaded_compact = await retained(load), await retained(load_compact)
+        print(f"  {name}")
+        print(f"    buscadas:    ImageSource {fresh:6.0f}  CompactImage {fresh_compact:6.0f}  ({1 - fresh_compact / fresh:.0%} menos)")
+        print(f"    do MongoDB:  ImageSource {loaded:6.0f}  CompactImage {loaded_compact:6.0f}  ({1 - loaded_compact / loaded:.0%} menos)")
+    await http_client.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
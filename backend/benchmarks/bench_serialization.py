@@ -0,0 +1,106 @@
+"""CPU por requisição para montar e serializar a resposta de /api/search.
+
+Compara o caminho antigo (SearchResponse validado e o FastAPI validando/serializando de novo via
+response_model + JSONResponse) com o caminho rápido (SearchResponse.model_construct + FastJSONResponse).
+Também mede a construção dos itens: no pydantic-core 2.x a validação em Rust sai mais barata que o
+model_construct (laço em Python), por isso os adapters continuam usando ImageSource(...).
+
+Uso (a partir de backend/): python benchmarks/bench_serialization.py [--images 250] [--rounds 200]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from responses import FastJSONResponse  # noqa: E402
+from schemas import ImageSource, SearchResponse, SourceStatus  # noqa: E402
+from server import app  # noqa: E402
+
+
+def raw_items(count: int) -> list:
+    """Itens no formato que os adapters montam a partir do JSON das APIs"""
+    return [{
+        'title': f'Foto de teste número {i} com um título razoavelmente longo',
+        'description': 'Descrição da imagem usada apenas no benchmark de serialização',
+        'thumbnail_url': f'https://images.example.com/photo-{i}?w=200&q=80',
+        'regular_url': f'https://images.example.com/photo-{i}?w=1080&q=80',
+        'raw_url': f'https://images.example.com/photo-{i}',
+        'photographer': f'Fotógrafo {i % 37}',
+        'photographer_url': f'https://example.com/@user{i % 37}',
+        'source': ('unsplash', 'pexels', 'pixabay', 'google')[i % 4],
+        'source_url': f'https://example.com/photos/{i}',
+        'download_url': f'https://example.com/photos/{i}/download',
+        'license': 'free',
+        'image_id': f'id-{i}'
+    } for i in range(count)]
+
+
+def statuses(images: list) -> dict:
+    return {source: SourceStatus(status='ok', result_count=len(images) // 4, time_ms=120.0)
+            for source in ('unsplash', 'pexels', 'pixabay', 'google')}
+
+
+async def before(items: list, field) -> bytes:
+    images = [ImageSource(**item) for item in items]
+    response = SearchResponse(query='teste', total_results=len(images), images=images,
+                              search_time_ms=123.4, source_status=statuses(images))
+    content = await serialize_response(field=field, response_content=response)
+    return JSONResponse(content).body
+
+
+async def after(items: list, field) -> bytes:
+    images = [ImageSource(**item) for item in items]
+    response = SearchResponse.model_construct(query='teste', total_results=len(images), images=images,
+                                              search_time_ms=123.4, source_status=statuses(images),
+                                              next_cursor=None)
+    return FastJSONResponse(response).body
+
+
+async def measure(fn, items: list, field, rounds: int) -> float:
+    await fn(items, field)  # aquecimento
+    start = time.process_time()
+    for _ in range(rounds):
+        await fn(items, field)
+    return (time.process_time() - start) / rounds * 1000
+
+
+async def validated_items(items: list, field):
+    return [ImageSource(**item) for item in items]
+
+
+async def constructed_items(items: list, field):
+    return [ImageSource.model_construct(**item) for item in items]
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--images', type=int, default=250)
+    parser.add_argument('--rounds', type=int, default=200)
+    args = parser.parse_args()
+
+    route = next(route for route in app.routes if getattr(route, 'path', None) == '/api/search')
+    field = route.response_field
+    items = raw_items(args.images)
+
+    # As duas saídas precisam representar o mesmo JSON
+    old_body, new_body = await before(items, field), await after(items, field)
+    assert json.loads(old_body) == json.loads(new_body), "serializações divergentes"
+
+    old_ms = await measure(before, items, field, args.rounds)
+    new_ms = await measure(after, items, field, args.rounds)
+    print(f"{args.images} imagens, {args.rounds} rodadas (CPU por requisição)")
+    print(f"  antes:  {old_ms:.3f} ms")
+    print(f"  depois: {new_ms:.3f} ms  ({old_ms / new_ms:.1f}x)")
+    print("construção dos itens")
+    print(f"  ImageSource(...):      {await measure(validated_items, items, field, args.rounds):.3f} ms")
+    print(f"  model_construct(...):  {await measure(constructed_items, items, field, args.rounds):.3f} ms")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -1,6 +1,7 @@
 from pydantic_settings import BaseSettings
 from pydantic import ConfigDict
 from functools import lru_cache
+from typing import Dict, List
 import os
 
 class Settings(BaseSettings):
@@ -35,10 +36,165 @@ class Settings(BaseSettings):
     inpe_api_key: str = ""
     ibge_api_key: str = ""
     
+    # Cliente HTTP compartilhado
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 40
+    http_keepalive_expiry: float = 30.0
+    http_connect_timeout: float = 5.0
+    http2_enabled: bool = True
+    
+    # Busca
+    search_deadline_ms: int = 8000
+    # Page size usado nas chamadas upstream no modo cursor (limitado pelo máximo de cada fonte)
+    cursor_upstream_page_size: int = 50
+    
+    # Ordenação do resultado combinado (concat | round_robin | scored)
+    search_rank_default: str = "scored"
+    bm25_k1: float = 1.2
+    bm25_b: float = 0.75
+    # Peso do BM25 contra a posição original na fonte
+    rank_bm25_weight: float = 0.6
+    # Cada item seguinte da mesma fonte vale rank_source_decay^n do seu score
+    rank_source_decay: float = 0.85
+    
+    # Índice invertido local de tudo que já foi buscado (modo index_first)
+    index_enabled: bool = True
+    index_collection: str = "image_index"
+    index_ttl_days: float = 90.0
+    index_candidate_limit: int = 1000
+    # Fração do per_page que o índice precisa cobrir para responder sem ir às fontes
+    index_min_recall: float = 1.0
+    
+    # Quase-duplicatas por hash perceptual das miniaturas (etapa opcional do merge)
+    phash_enabled: bool = False
+    phash_algorithm: str = "dhash"  # dhash | phash
+    phash_max_distance: int = 6
+    phash_workers: int = 2
+    phash_max_downloads: int = 16
+    phash_download_timeout_s: float = 3.0
+    # Miniaturas têm poucos KB; fontes que caem para o original (Openverse, IBGE) passam disso e ficam sem hash
+    phash_max_source_bytes: int = 4 * 1024 * 1024
+    phash_timeout_ms: int = 1500
+    phash_cache_max_entries: int = 50000
+    
+    # Imagens recém-devolvidas, para /api/thumb e /api/download/bulk resolverem URLs e metadados
+    image_registry_max_entries: int = 50000
+    
+    # Proxy de miniaturas (/api/thumb): reduzidas num pool de processos e guardadas em disco
+    thumb_enabled: bool = True
+    thumb_cache_dir: str = "/tmp/lumina_thumbs"
+    thumb_cache_max_bytes: int = 512 * 1024 * 1024
+    thumb_sizes: List[int] = [200, 400, 800]
+    thumb_default_size: int = 400
+    thumb_quality: int = 82
+    thumb_workers: int = 2
+    thumb_max_downloads: int = 16
+    thumb_download_timeout_s: float = 8.0
+    thumb_max_source_bytes: int = 20 * 1024 * 1024
+    thumb_max_age_s: int = 7 * 86400
+    
+    # Busca em lote (/api/search/batch): limite único de chamadas simultâneas às fontes
+    batch_max_queries: int = 1000
+    batch_max_concurrency: int = 16
+    
+    # Download em lote (/api/download/bulk): ZIP montado em streaming
+    bulk_download_max_items: int = 500
+    bulk_download_concurrency: int = 6
+    bulk_download_timeout_s: float = 30.0
+    bulk_download_max_file_bytes: int = 100 * 1024 * 1024
+    # Acima disso, cada arquivo em voo vai para disco (SpooledTemporaryFile)
+    bulk_download_spool_bytes: int = 2 * 1024 * 1024
+    bulk_download_chunk_bytes: int = 64 * 1024
+    
+    # Divisão do per_page entre as fontes (modo cursor)
+    allocation_ewma_alpha: float = 0.2
+    allocation_latency_ref_s: float = 1.0
+    allocation_min_weight: float = 0.05
+    allocation_max_rounds: int = 2
+    allocation_min_round_ms: int = 300
+    
+    # Circuit breaker por fonte
+    circuit_failure_threshold: int = 5
+    circuit_error_rate_threshold: float = 0.5
+    circuit_window_size: int = 20
+    circuit_min_calls: int = 10
+    circuit_open_seconds: float = 30.0
+    
+    # Timeout adaptativo por fonte (p99 observado x fator)
+    adaptive_timeout_enabled: bool = True
+    adaptive_timeout_factor: float = 1.5
+    adaptive_timeout_min: float = 1.0
+    adaptive_timeout_max: float = 15.0
+    latency_window_size: int = 200
+    latency_min_samples: int = 20
+    # Chamada sem resposta (timeout ou cancelada pelo prazo da busca) conta contra a fonte a partir
+    # do timeout adaptativo, limitado a este valor: precisa ficar abaixo de search_deadline_ms
+    slow_call_threshold_s: float = 5.0
+    
+    # Hedging (cópia da requisição após o percentil indicado, só para as fontes listadas)
+    hedging_enabled: bool = True
+    hedge_budget_ratio: float = 0.05
+    hedge_percentiles: Dict[str, float] = {
+        "unsplash": 95,
+        "pexels": 95,
+        "pixabay": 95,
+        "creative_commons": 95
+    }
+    
+    # Rate limit por fonte ("requisições/segundos"), compartilhado entre workers via MongoDB
+    rate_limit_enabled: bool = True
+    rate_limit_shared: bool = True
+    rate_limit_collection: str = "rate_limits"
+    rate_limit_max_wait_s: float = 2.0
+    rate_limit_default_block_s: float = 60.0
+    rate_limits: Dict[str, str] = {
+        "google": "100/86400",
+        "unsplash": "50/3600",
+        "pexels": "200/3600",
+        "pixabay": "100/60"
+    }
+    
+    # Prefetch da próxima página em segundo plano depois de cada /api/search
+    prefetch_enabled: bool = True
+    prefetch_concurrency: int = 4
+    prefetch_delay_ms: int = 200
+    prefetch_timeout_s: float = 10.0
+    prefetch_max_pending: int = 64
+    # Fração da cota da fonte que o prefetch nunca consome (fica para buscas reais)
+    prefetch_quota_reserve: float = 0.2
+    
+    # Header Server-Timing em /api/search (fases HTTP de cada fonte, parse, mapeamento e merge)
+    server_timing_enabled: bool = True
+    
+    # Tokens OAuth (client credentials), compartilhados entre workers via MongoDB
+    oauth_token_collection: str = "oauth_tokens"
+    oauth_refresh_margin_s: float = 300.0
+    oauth_default_ttl_s: float = 3600.0
+    oauth_retry_s: float = 30.0
+    
     # Database
     mongo_url: str = "mongodb://localhost:27017"
     db_name: str = "image_search"
+    mongo_timeout_ms: int = 1000
+    mongo_retry_seconds: float = 30.0
     cors_origins: str = "*"
+    
+    # Cache de resultados (LRU em memória + MongoDB com TTL)
+    cache_enabled: bool = True
+    cache_mongo_enabled: bool = True
+    cache_collection: str = "search_cache"
+    cache_memory_max_entries: int = 2000
+    cache_default_ttl_seconds: int = 1800
+    cache_ttl_seconds: Dict[str, int] = {
+        "unsplash": 600,
+        "pexels": 900,
+        "pixabay": 900,
+        "google": 3600,
+        "creative_commons": 3600,
+        "agencia_brasil": 3600,
+        "ibge": 86400,
+        "inpe": 86400
+    }
 
 @lru_cache()
 def get_settings():
@@ -0,0 +1,74 @@
+"""Pré-carrega o índice local com uma lista de temas (ex.: temas do currículo).
+
+Cada tema é buscado nas fontes pelo mesmo caminho da API (cache, circuit breaker, rate limit),
+então as imagens entram no cache e no índice exatamente como numa busca normal.
+
+Uso (a partir de backend/):
+    python ingest_topics.py temas.txt [--sources unsplash,pexels,pixabay] [--pages 2] [--per-page 50]
+
+O arquivo tem um tema por linha; linhas vazias e iniciadas por # são ignoradas.
+"""
+import argparse
+import asyncio
+import time
+from services.database import database
+from services.http_client import http_client
+from services.local_index import local_index
+from services.providers import PROVIDERS, is_configured, parse_sources, search_provider
+
+
+def read_topics(path: str) -> list:
+    with open(path, encoding='utf-8') as file:
+        return [line.strip() for line in file if line.strip() and not line.lstrip().startswith('#')]
+
+
+async def ingest(topics: list, sources: list, pages: int, per_page: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    totals = {'calls': 0, 'images': 0, 'failed': 0}
+
+    async def run(topic: str, source: str, page: int):
+        async with semaphore:
+            try:
+                images = await search_provider(source, topic, page, min(per_page, PROVIDERS[source].max_page_size), 'relevant')
+            except Exception as e:
+                totals['failed'] += 1
+                print(f"  {source} '{topic}' p{page}: {e!r}")
+                return
+            totals['calls'] += 1
+            totals['images'] += len(images)
+
+    for topic in topics:
+        start = time.perf_counter()
+        await asyncio.gather(*(run(topic, source, page) for source in sources for page in range(1, pages + 1)))
+        print(f"{topic}: {(time.perf_counter() - start) * 1000:.0f} ms")
+    return totals
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('topics_file')
+    parser.add_argument('--sources', default='unsplash,pexels,pixabay,creative_commons')
+    parser.add_argument('--pages', type=int, default=1)
+    parser.add_argument('--per-page', type=int, default=50)
+    parser.add_argument('--concurrency', type=int, default=4)
+    args = parser.parse_args()
+
+    sources = [source for source in parse_sources(args.sources) if is_configured(source)]
+    if not sources:
+        raise SystemExit("Nenhuma das fontes pedidas está configurada")
+    topics = read_topics(args.topics_file)
+
+    await http_client.start()
+    await local_index.ensure_indexes()
+    try:
+        totals = await ingest(topics, sources, args.pages, args.per_page, args.concurrency)
+        await local_index.flush()
+    finally:
+        await http_client.close()
+        database.close()
+    print(f"{len(topics)} temas, {totals['calls']} chamadas, {totals['images']} imagens, "
+          f"{totals['failed']} falhas; índice: {local_index.stats()}")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
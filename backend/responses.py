@@ -0,0 +1,24 @@
+from typing import Any
+import orjson
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+
+def _default(obj: Any) -> Any:
+    # Os modelos das respostas são montados por nós (model_construct), então o __dict__ já é o JSON final
+    if isinstance(obj, BaseModel):
+        return obj.__dict__
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default)
+
+
+class FastJSONResponse(ORJSONResponse):
+    """Resposta JSON via orjson que serializa modelos Pydantic sem model_dump nem revalidação.
+
+    Retornar um Response direto também faz o FastAPI pular a validação do response_model.
+    """
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -1,5 +1,11 @@
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict
+
+class SourceRef(BaseModel):
+    source: str
+    source_url: str
+    image_id: str
+    license: str
 
 class ImageSource(BaseModel):
     title: str
@@ -14,9 +20,42 @@ class ImageSource(BaseModel):
     download_url: str
     license: str
     image_id: str
+    # ISO-8601 UTC ("AAAA-MM-DDTHH:MM:SSZ"), quando a fonte informa a data
+    published_at: Optional[str] = None
+    # Preenchido quando a mesma imagem veio de mais de uma fonte (deduplicação)
+    sources: Optional[List[SourceRef]] = None
+
+class SourceStatus(BaseModel):
+    status: str  # ok | timeout | error | skipped
+    result_count: int = 0
+    time_ms: Optional[float] = None
+    error: Optional[str] = None
 
 class SearchResponse(BaseModel):
     query: str
     total_results: int
     images: List[ImageSource]
-    search_time_ms: float
\ No newline at end of file
+    search_time_ms: float
+    source_status: Dict[str, SourceStatus] = {}
+    duplicates_removed: int = 0
+    origin: str = "upstream"  # upstream | index
+    # Presente no modo cursor (sem `page`); None quando todas as fontes se esgotaram
+    next_cursor: Optional[str] = None
+class BulkDownloadItem(BaseModel):
+    source: str
+    image_id: str
+    # Precisa ser uma das URLs da imagem (download/raw/regular); vazio usa a melhor disponível
+    download_url: Optional[str] = None
+
+class BulkDownloadRequest(BaseModel):
+    items: List[BulkDownloadItem]
+
+class BatchSearchRequest(BaseModel):
+    queries: List[str]
+    page: int = Field(1, ge=1)
+    per_page: int = Field(50, ge=1, le=100)
+    sources: str = "google,unsplash,pexels,pixabay"
+    order_by: str = Field("relevant", pattern="^(relevant|latest|oldest)$")
+    deadline_ms: Optional[int] = Field(None, ge=100, le=60000)
+    rank: Optional[str] = Field(None, pattern="^(concat|round_robin|scored)$")
+    near_duplicates: Optional[bool] = None
@@ -1,29 +1,59 @@
-from fastapi import FastAPI, Query, HTTPException
+from fastapi import FastAPI, Query, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
+from contextlib import aclosing, asynccontextmanager
+import math
 import os
 import time
-import asyncio
-from schemas import SearchResponse
-from services.google_search import google_service
-from services.unsplash_service import unsplash_service
-from services.pexels_service import pexels_service
-from services.pixabay_service import pixabay_service
-from services.shutterstock_service import shutterstock_service
-from services.getty_service import getty_service
-from services.istock_service import istock_service
-from services.pulsar_service import pulsar_service
-from services.fotoarena_service import fotoarena_service
-from services.usp_service import usp_service
-from services.tyba_service import tyba_service
-from services.natureza_brasileira_service import natureza_brasileira_service
-from services.colombini_service import colombini_service
-from services.freepik_service import freepik_service
-from services.creative_commons_service import creative_commons_service
-from services.agencia_brasil_service import agencia_brasil_service
-from services.inpe_service import inpe_service
-from services.ibge_service import ibge_service
-
-app = FastAPI(title="Lumina Search API")
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+from config import get_settings
+from schemas import BatchSearchRequest, BulkDownloadRequest, SearchResponse, SourceStatus
+from responses import FastJSONResponse, dumps
+from services.http_client import http_client
+from services.providers import PROVIDERS, is_configured, parse_sources
+from services.search_orchestrator import SourceResult, gather_search, iter_plan, iter_search, merge_status, page_call
+from services.ranking import merge_results
+from services.dedup import Deduplicator, dedupe
+from services.perceptual_hash import perceptual_hasher
+from services.local_index import local_index
+from services.pagination import InvalidCursorError, PagePlan, SearchCursor, plan_page
+from services.cache_service import result_cache
+from services.database import database
+from services.singleflight import request_flight, provider_flight
+from services.circuit_breaker import circuit_breakers
+from services.rate_limiter import rate_limiter
+from services.latency_tracker import latency_tracker
+from services.hedging import hedging_policy
+from services.allocation import allocation_stats
+from services.oauth_token_manager import oauth_tokens
+from services.prefetch import PageRequest, prefetcher
+from services.image_registry import image_registry
+from services.bulk_download import bulk_downloader
+from services.batch_search import batch_scheduler
+from services.metrics import registry as metrics_registry, search_duration
+from services.timings import RequestTimings, current_timings, record_stage
+from services.thumbnails import ThumbnailNotFoundError, ThumbnailUnavailableError, thumbnails
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await http_client.start()
+    await result_cache.ensure_indexes()
+    await local_index.ensure_indexes()
+    oauth_tokens.start()
+    if get_settings().phash_enabled:
+        await perceptual_hasher.start()
+    await thumbnails.start()
+    yield
+    await prefetcher.cancel_all()
+    await oauth_tokens.stop()
+    await local_index.flush()
+    perceptual_hasher.close()
+    thumbnails.close()
+    await http_client.close()
+    database.close()
+
+app = FastAPI(title="Lumina Search API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -37,119 +67,382 @@ app.add_middleware(
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/api/stats")
+async def get_stats():
+    """Estatísticas internas (pool HTTP, cache, single-flight, tokens OAuth e métricas por fonte)"""
+    return {
+        "http_pool": http_client.stats(),
+        "cache": result_cache.stats(),
+        "singleflight": {
+            "requests": request_flight.stats(),
+            "providers": provider_flight.stats()
+        },
+        "latency": latency_tracker.snapshot(),
+        "hedging": hedging_policy.stats(),
+        "allocation": allocation_stats.snapshot(),
+        "oauth": oauth_tokens.stats(),
+        "perceptual_hash": perceptual_hasher.stats(),
+        "local_index": local_index.stats(),
+        "prefetch": prefetcher.stats(),
+        "thumbnails": thumbnails.stats(),
+        "image_registry": image_registry.stats(),
+        "bulk_download": bulk_downloader.stats(),
+        "batch": batch_scheduler.stats()
+    }
+
+@app.get("/metrics")
+async def get_metrics():
+    """Métricas no formato do Prometheus (latência e resultado por fonte, pool HTTP, cache, fan-out)"""
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.get("/api/sources")
 async def get_available_sources():
     """Retorna lista de fontes disponíveis (gratuitas e pagas)"""
-    from config import get_settings
-    settings = get_settings()
-    
-    sources = {
-        "free": [
-            {"id": "google", "name": "Google Custom Search", "available": bool(settings.google_api_key and settings.google_search_engine_id)},
-            {"id": "unsplash", "name": "Unsplash", "available": bool(settings.unsplash_api_key)},
-            {"id": "pexels", "name": "Pexels", "available": bool(settings.pexels_api_key)},
-            {"id": "pixabay", "name": "Pixabay", "available": bool(settings.pixabay_api_key)}
-        ],
-        "paid": [
-            {"id": "shutterstock", "name": "Shutterstock", "available": bool(settings.shutterstock_client_id and settings.shutterstock_client_secret)},
-            {"id": "getty_images", "name": "Getty Images", "available": bool(settings.getty_images_api_key)},
-            {"id": "istock", "name": "iStock", "available": bool(settings.istock_api_key)},
-            {"id": "pulsar_imagens", "name": "Pulsar Imagens", "available": bool(settings.pulsar_imagens_api_key)},
-            {"id": "fotoarena", "name": "Foto Arena", "available": bool(settings.fotoarena_api_key)},
-            {"id": "usp_imagens", "name": "USP Imagens", "available": bool(settings.usp_imagens_api_key)},
-            {"id": "tyba", "name": "Tyba", "available": bool(settings.tyba_api_key)},
-            {"id": "natureza_brasileira", "name": "Natureza Brasileira", "available": bool(settings.natureza_brasileira_api_key)},
-            {"id": "fabio_colombini", "name": "Fabio Colombini", "available": bool(settings.fabio_colombini_api_key)},
-            {"id": "freepik", "name": "Freepik", "available": bool(settings.freepik_api_key)},
-            {"id": "creative_commons", "name": "Creative Commons", "available": True},
-            {"id": "agencia_brasil", "name": "Agência Brasil", "available": bool(settings.agencia_brasil_api_key)},
-            {"id": "inpe", "name": "INPE Satélite", "available": bool(settings.inpe_api_key)},
-            {"id": "ibge", "name": "IBGE Cidades", "available": bool(settings.ibge_api_key)}
-        ]
-    }
+    sources = {"free": [], "paid": []}
+    for source_id, provider in PROVIDERS.items():
+        sources[provider.tier].append({
+            "id": source_id,
+            "name": provider.name,
+            "available": is_configured(source_id),
+            "circuit": circuit_breakers.get(source_id).snapshot(),
+            "quota": rate_limiter.snapshot(source_id)
+        })
     return sources
 
+def validate_search(query: str, sources: str) -> List[str]:
+    if not query:
+        raise HTTPException(status_code=400, detail="Query de busca é obrigatória")
+    
+    source_list = parse_sources(sources)
+    
+    if not source_list:
+        raise HTTPException(status_code=400, detail="Nenhuma fonte válida especificada")
+    return source_list
+
+def plan_search(query: str, page: Optional[int], per_page: int, source_list: List[str],
+                order_by: str, cursor: Optional[str]) -> Tuple[Callable[[int], AsyncIterator[SourceResult]], Optional[PagePlan]]:
+    """Escolhe o modo de paginação e devolve uma função deadline_ms -> iterador de resultados.
+
+    Com `page`: modo clássico, cada fonte recebe page/per_page.
+    Sem `page`: modo cursor, per_page é o total da resposta dividido entre as fontes.
+    """
+    if page is not None:
+        make_call = page_call(query, page, per_page, order_by)
+        return (lambda deadline_ms: iter_search(source_list, make_call, deadline_ms)), None
+    
+    try:
+        search_cursor = SearchCursor.decode(cursor, query, order_by) if cursor else SearchCursor()
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=f"Cursor inválido: {e}")
+    
+    active_sources = [source for source in source_list if is_configured(source)]
+    plan = plan_page(search_cursor, active_sources, per_page)
+    skip = {source: "exhausted" for source in source_list if source in search_cursor.exhausted}
+    return (lambda deadline_ms: iter_plan(source_list, plan, query, order_by, deadline_ms, skip)), plan
+
 @app.get("/api/search", response_model=SearchResponse)
 async def search_images(
     query: str = Query(..., min_length=1, max_length=100),
-    page: int = Query(1, ge=1),
+    page: Optional[int] = Query(None, ge=1),
     per_page: int = Query(50, ge=1, le=100),
     sources: str = Query("google,unsplash,pexels,pixabay"),
-    order_by: str = Query("relevant", regex="^(relevant|latest|oldest)$")
+    order_by: str = Query("relevant", regex="^(relevant|latest|oldest)$"),
+    deadline_ms: Optional[int] = Query(None, ge=100, le=60000),
+    cursor: Optional[str] = Query(None, max_length=2000),
+    rank: Optional[str] = Query(None, regex="^(concat|round_robin|scored)$"),
+    near_duplicates: Optional[bool] = Query(None),
+    mode: str = Query("live", regex="^(live|index_first)$"),
+    prefetch: Optional[bool] = Query(None),
+    timings: bool = Query(False)
 ):
-    if not query:
-        raise HTTPException(status_code=400, detail="Query de busca é obrigatória")
+    source_list = validate_search(query, sources)
+    start_search, plan = plan_search(query, page, per_page, source_list, order_by, cursor)
     
-    source_list = [s.strip() for s in sources.split(",")]
-    valid_sources = ["google", "unsplash", "pexels", "pixabay", "shutterstock", "getty_images", "istock", "pulsar_imagens", "fotoarena", "usp_imagens", "tyba", "natureza_brasileira", "fabio_colombini", "freepik", "creative_commons", "agencia_brasil", "inpe", "ibge"]
-    source_list = [s for s in source_list if s in valid_sources]
+    settings = get_settings()
+    request_timings = RequestTimings() if timings or settings.server_timing_enabled else None
+    # Resetado ao sair: o prefetch agendado depois da resposta não entra na conta desta requisição
+    token = current_timings.set(request_timings)
+    try:
+        return await timed_search(query, page, per_page, source_list, order_by, deadline_ms, cursor, rank,
+                                  near_duplicates, mode, prefetch, timings, start_search, plan)
+    finally:
+        current_timings.reset(token)
+
+async def timed_search(query: str, page: Optional[int], per_page: int, source_list: List[str], order_by: str,
+                       deadline_ms: Optional[int], cursor: Optional[str], rank: Optional[str],
+                       near_duplicates: Optional[bool], mode: str, prefetch: Optional[bool], include_timings: bool,
+                       start_search: Callable[[int], AsyncIterator[SourceResult]], plan: Optional[PagePlan]) -> Response:
+    # O índice só responde à paginação clássica: seus deslocamentos não cabem no cursor das fontes
+    if mode == "index_first" and page is not None and order_by == "relevant":
+        indexed = await search_index(query, page, per_page, source_list)
+        if indexed is not None:
+            return timed_response(indexed, include_timings)
     
-    if not source_list:
-        raise HTTPException(status_code=400, detail="Nenhuma fonte válida especificada")
+    settings = get_settings()
+    if deadline_ms is None:
+        deadline_ms = settings.search_deadline_ms
+    if rank is None:
+        rank = settings.search_rank_default
+    if near_duplicates is None:
+        near_duplicates = settings.phash_enabled
+    if prefetch is None:
+        prefetch = settings.prefetch_enabled
+    
+    key = (result_cache.normalize_query(query), page, per_page, tuple(source_list), order_by, deadline_ms, cursor,
+           rank, near_duplicates)
+    response = await request_flight.do(
+        key, lambda: run_search(query, source_list, order_by, rank, near_duplicates, start_search(deadline_ms), plan)
+    )
+    # Os itens já vêm dos adapters; devolver o Response direto evita a revalidação do response_model
+    if not prefetch:
+        return timed_response(response, include_timings)
+    # O prefetch da próxima página só é agendado depois que a resposta foi enviada
+    pages = next_pages(response.source_status, response.next_cursor, page, per_page, plan)
+    return timed_response(response, include_timings,
+                          background=BackgroundTask(prefetcher.schedule, query, order_by, pages))
+
+def timed_response(response: SearchResponse, include_timings: bool, background: Optional[BackgroundTask] = None) -> Response:
+    """Serializa a busca com o header Server-Timing e, se pedido, o bloco "timings" no corpo.
+
+    Requisições coalescidas pelo single-flight (ou servidas pelo cache) não têm fases HTTP próprias:
+    as chamadas às fontes, quando houve, entram nos tempos da requisição que as executou.
+    """
+    request_timings = current_timings.get()
+    if request_timings is None:
+        return FastJSONResponse(response, background=background)
+    start = time.perf_counter()
+    body = dumps(response)
+    request_timings.stage("serialize", time.perf_counter() - start)
+    if include_timings:
+        # O corpo é um objeto JSON: o bloco entra antes do "}" final, sem serializar a busca de novo
+        body = body[:-1] + b',"timings":' + dumps(request_timings.to_dict()) + b'}'
+    headers = {"Server-Timing": request_timings.server_timing()} if get_settings().server_timing_enabled else None
+    return Response(body, media_type="application/json", headers=headers, background=background)
+
+def next_pages(source_status: Dict[str, SourceStatus], next_cursor: Optional[str], page: Optional[int], per_page: int,
+               plan: Optional[PagePlan]) -> List[PageRequest]:
+    """Chamadas às fontes que a próxima página desta busca vai fazer"""
+    if plan is not None:
+        return plan.prefetch_pages() if next_cursor else []
+    # Modo clássico: só as fontes que responderam com a página cheia devem ter uma próxima
+    return [
+        (source, page + 1, per_page) for source, status in source_status.items()
+        if status.status == 'ok' and status.result_count >= min(per_page, PROVIDERS[source].max_page_size)
+    ]
+
+async def search_index(query: str, page: int, per_page: int, source_list: List[str]) -> Optional[SearchResponse]:
+    """Resposta a partir do índice local, ou None se ele não cobrir a página (recall baixo)"""
+    start_time = time.time()
+    with record_stage("index"):
+        found = await local_index.search(query, source_list, (page - 1) * per_page, per_page)
+    enough = found is not None and len(found[0]) >= math.ceil(per_page * get_settings().index_min_recall)
+    local_index.record_outcome(enough)
+    if not enough:
+        return None
     
+    images, _ = found
+    image_registry.remember(images)
+    search_time_ms = (time.time() - start_time) * 1000
+    search_duration.observe(search_time_ms / 1000, "index")
+    source_status = {
+        source: SourceStatus(status='ok', result_count=sum(image.source == source for image in images), time_ms=search_time_ms)
+        for source in source_list
+    }
+    return SearchResponse.model_construct(
+        query=query,
+        total_results=len(images),
+        images=images,
+        search_time_ms=search_time_ms,
+        source_status=source_status,
+        duplicates_removed=0,
+        origin="index",
+        next_cursor=None
+    )
+
+async def run_search(query: str, source_list: List[str], order_by: str, rank: str, near_duplicates: bool,
+                     source_results: AsyncIterator[SourceResult], plan: Optional[PagePlan]) -> SearchResponse:
+    """Fan-out da busca para as fontes selecionadas, limitado pelo prazo global"""
     start_time = time.time()
     
-    tasks = []
-    # Fontes gratuitas
-    if "google" in source_list:
-        tasks.append(google_service.search_images(query, page, per_page))
-    if "unsplash" in source_list:
-        tasks.append(unsplash_service.search_images(query, page, per_page, order_by))
-    if "pexels" in source_list:
-        tasks.append(pexels_service.search_images(query, page, per_page, order_by))
-    if "pixabay" in source_list:
-        tasks.append(pixabay_service.search_images(query, page, per_page, order_by))
-    
-    # Fontes pagas internacionais
-    if "shutterstock" in source_list:
-        tasks.append(shutterstock_service.search_images(query, page, per_page))
-    if "getty_images" in source_list:
-        tasks.append(getty_service.search_images(query, page, per_page))
-    if "istock" in source_list:
-        tasks.append(istock_service.search_images(query, page, per_page))
-    if "pulsar_imagens" in source_list:
-        tasks.append(pulsar_service.search_images(query, page, per_page))
-    
-    # Fontes pagas brasileiras
-    if "fotoarena" in source_list:
-        tasks.append(fotoarena_service.search_images(query, page, per_page))
-    if "usp_imagens" in source_list:
-        tasks.append(usp_service.search_images(query, page, per_page))
-    if "tyba" in source_list:
-        tasks.append(tyba_service.search_images(query, page, per_page))
-    if "natureza_brasileira" in source_list:
-        tasks.append(natureza_brasileira_service.search_images(query, page, per_page))
-    if "fabio_colombini" in source_list:
-        tasks.append(colombini_service.search_images(query, page, per_page))
-    
-    # Freepik
-    if "freepik" in source_list:
-        tasks.append(freepik_service.search_images(query, page, per_page))
-    
-    # Creative Commons
-    if "creative_commons" in source_list:
-        tasks.append(creative_commons_service.search_images(query, page, per_page, order_by))
-    
-    # Fontes Públicas Brasileiras
-    if "agencia_brasil" in source_list:
-        tasks.append(agencia_brasil_service.search_images(query, page, per_page, order_by))
-    if "inpe" in source_list:
-        tasks.append(inpe_service.search_images(query, page, per_page, order_by))
-    if "ibge" in source_list:
-        tasks.append(ibge_service.search_images(query, page, per_page, order_by))
-    
-    results = await asyncio.gather(*tasks, return_exceptions=True)
-    
-    all_images = []
-    for result in results:
-        if not isinstance(result, Exception):
-            all_images.extend(result)
+    with record_stage("fanout"):
+        results, statuses = await gather_search(source_results)
+    with record_stage("dedup"):
+        results, duplicates_removed = dedupe(results, source_list)
+        if near_duplicates and perceptual_hasher.available:
+            results, similar_removed = await perceptual_hasher.collapse(results, source_list)
+            duplicates_removed += similar_removed
+    with record_stage("merge"):
+        all_images = merge_results(results, source_list, query, rank, order_by)
+    image_registry.remember(all_images)
     
     search_time_ms = (time.time() - start_time) * 1000
+    search_duration.observe(search_time_ms / 1000, "upstream")
     
-    return SearchResponse(
+    return SearchResponse.model_construct(
         query=query,
         total_results=len(all_images),
         images=all_images,
-        search_time_ms=search_time_ms
-    )
\ No newline at end of file
+        search_time_ms=search_time_ms,
+        source_status={source: statuses[source] for source in source_list},
+        duplicates_removed=duplicates_removed,
+        next_cursor=plan.next_cursor(query, order_by) if plan is not None else None
+    )
+
+@app.get("/api/search/stream")
+async def search_images_stream(
+    query: str = Query(..., min_length=1, max_length=100),
+    page: Optional[int] = Query(None, ge=1),
+    per_page: int = Query(50, ge=1, le=100),
+    sources: str = Query("google,unsplash,pexels,pixabay"),
+    order_by: str = Query("relevant", regex="^(relevant|latest|oldest)$"),
+    deadline_ms: Optional[int] = Query(None, ge=100, le=60000),
+    cursor: Optional[str] = Query(None, max_length=2000),
+    format: str = Query("ndjson", regex="^(ndjson|sse)$"),
+    prefetch: Optional[bool] = Query(None)
+):
+    """Mesma busca de /api/search, mas emite um evento por fonte assim que ela responde.
+
+    Eventos: {"type": "source", ...} para cada fonte e um {"type": "summary", ...} final.
+    Os lotes saem na ordem de chegada: a ordem global de latest/oldest só existe em /api/search,
+    que espera todas as fontes (a interface usa aquele endpoint para essas ordenações).
+    """
+    source_list = validate_search(query, sources)
+    start_search, plan = plan_search(query, page, per_page, source_list, order_by, cursor)
+    
+    settings = get_settings()
+    if deadline_ms is None:
+        deadline_ms = settings.search_deadline_ms
+    if prefetch is None:
+        prefetch = settings.prefetch_enabled
+    
+    def encode(event: dict) -> bytes:
+        data = dumps(event)
+        if format == "sse":
+            return b"event: " + event['type'].encode() + b"\ndata: " + data + b"\n\n"
+        return data + b"\n"
+    
+    async def events():
+        start_time = time.time()
+        statuses = {}
+        # Itens já enviados não podem ser recolhidos: duplicatas posteriores são só descartadas
+        deduplicator = Deduplicator()
+        async with aclosing(start_search(deadline_ms)) as results:
+            async for source, images, status in results:
+                statuses[source] = merge_status(statuses.get(source), status)
+                images = deduplicator.add_batch(source, images)
+                image_registry.remember(images)
+                yield encode({
+                    "type": "source",
+                    "source": source,
+                    "images": images,
+                    "status": status
+                })
+        source_status = {source: statuses[source] for source in source_list}
+        next_cursor = plan.next_cursor(query, order_by) if plan is not None else None
+        yield encode({
+            "type": "summary",
+            "query": query,
+            "total_results": sum(status.result_count for status in statuses.values()) - deduplicator.removed,
+            "search_time_ms": (time.time() - start_time) * 1000,
+            "source_status": source_status,
+            "duplicates_removed": deduplicator.removed,
+            "next_cursor": next_cursor
+        })
+        # O "carregar mais" da interface usa este endpoint: a próxima página é agendada depois do resumo
+        if prefetch:
+            await prefetcher.schedule(query, order_by, next_pages(source_status, next_cursor, page, per_page, plan))
+    
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    # X-Accel-Buffering: evita que proxies (nginx) segurem os eventos
+    return StreamingResponse(events(), media_type=media_type, headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.post("/api/search/batch")
+async def search_batch(request: BatchSearchRequest):
+    """Várias queries com as mesmas opções (paginação clássica), em NDJSON na ordem em que terminam.
+
+    Eventos: {"type": "result", "index", "query", "response"} ou {"type": "error", ...} por query
+    e um {"type": "summary", ...} final.
+    """
+    settings = get_settings()
+    queries = [query.strip() for query in request.queries]
+    if not queries:
+        raise HTTPException(status_code=400, detail="Nenhuma query informada")
+    if len(queries) > settings.batch_max_queries:
+        raise HTTPException(status_code=400, detail=f"Máximo de {settings.batch_max_queries} queries por lote")
+    if any(not query or len(query) > 100 for query in queries):
+        raise HTTPException(status_code=400, detail="Cada query deve ter entre 1 e 100 caracteres")
+    source_list = validate_search(queries[0], request.sources)
+    
+    page, per_page, order_by = request.page, request.per_page, request.order_by
+    deadline_ms = request.deadline_ms or settings.search_deadline_ms
+    rank = request.rank or settings.search_rank_default
+    near_duplicates = settings.phash_enabled if request.near_duplicates is None else request.near_duplicates
+    
+    def run_query(query: str):
+        # Mesma chave de /api/search: uma query do lote e uma busca avulsa idêntica compartilham a execução
+        key = (result_cache.normalize_query(query), page, per_page, tuple(source_list), order_by, deadline_ms, None,
+               rank, near_duplicates)
+        make_call = batch_scheduler.limited(page_call(query, page, per_page, order_by))
+        return request_flight.do(
+            key, lambda: run_search(query, source_list, order_by, rank, near_duplicates,
+                                    iter_search(source_list, make_call, deadline_ms), None)
+        )
+    
+    async def events():
+        start_time = time.time()
+        failed = 0
+        active_sources = sum(is_configured(source) for source in source_list)
+        async with aclosing(batch_scheduler.run(queries, active_sources, run_query)) as results:
+            async for index, query, response, error in results:
+                if error is not None:
+                    failed += 1
+                    yield dumps({"type": "error", "index": index, "query": query, "error": repr(error)}) + b"\n"
+                else:
+                    yield dumps({"type": "result", "index": index, "query": query, "response": response}) + b"\n"
+        yield dumps({
+            "type": "summary",
+            "queries": len(queries),
+            "failed": failed,
+            "search_time_ms": (time.time() - start_time) * 1000
+        }) + b"\n"
+    
+    return StreamingResponse(events(), media_type="application/x-ndjson", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/api/thumb/{source}/{image_id:path}")
+async def get_thumbnail(request: Request, source: str, image_id: str, w: Optional[int] = Query(None)):
+    """Miniatura reduzida e em cache de uma imagem já devolvida por uma busca"""
+    settings = get_settings()
+    width = w or settings.thumb_default_size
+    if width not in settings.thumb_sizes:
+        raise HTTPException(status_code=400, detail=f"Largura deve ser uma de {settings.thumb_sizes}")
+    if not thumbnails.available:
+        raise HTTPException(status_code=404, detail="Proxy de miniaturas desativado")
+    
+    try:
+        thumbnail = await thumbnails.get(source, image_id, width)
+    except ThumbnailNotFoundError:
+        raise HTTPException(status_code=404, detail="Imagem desconhecida")
+    except ThumbnailUnavailableError as e:
+        raise HTTPException(status_code=502, detail=f"Fonte não entregou a imagem: {e}")
+    
+    # O ETag é o sha256 do arquivo: a mesma URL de origem e largura sempre geram a mesma resposta
+    headers = {"ETag": thumbnail.etag, "Cache-Control": f"public, max-age={settings.thumb_max_age_s}"}
+    if thumbnail.etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(thumbnail.path, media_type="image/jpeg", headers=headers)
+
+@app.post("/api/download/bulk")
+async def download_bulk(request: BulkDownloadRequest):
+    """ZIP das imagens selecionadas (já devolvidas por uma busca), com manifest.csv de licenças e fotógrafos"""
+    max_items = get_settings().bulk_download_max_items
+    if not request.items:
+        raise HTTPException(status_code=400, detail="Nenhuma imagem selecionada")
+    if len(request.items) > max_items:
+        raise HTTPException(status_code=400, detail=f"Máximo de {max_items} imagens por download")
+    
+    filename = time.strftime("imagens-%Y%m%d-%H%M%S.zip")
+    return StreamingResponse(
+        bulk_downloader.stream(request.items),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "X-Accel-Buffering": "no"}
+    )
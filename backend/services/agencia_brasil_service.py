@@ -1,7 +1,8 @@
-import httpx
 from typing import List
 from config import get_settings
 from schemas import ImageSource
+from services.http_client import http_client
+from services.provider_call import call_timeout, report_error
 
 class AgenciaBrasilService:
     """Agência Brasil (EBC) - Fotos jornalísticas"""
@@ -24,15 +25,16 @@ class AgenciaBrasilService:
                 'per_page': min(per_page, 50)
             }
             
-            async with httpx.AsyncClient(follow_redirects=True) as client:
-                response = await client.get(
-                    f"{self.base_url}/api/fotos",
-                    headers=headers,
-                    params=params,
-                    timeout=15.0
-                )
-                response.raise_for_status()
-                data = response.json()
+            client = http_client.client
+            response = await client.get(
+                f"{self.base_url}/api/fotos",
+                headers=headers,
+                params=params,
+                timeout=call_timeout(15.0),
+                follow_redirects=True
+            )
+            response.raise_for_status()
+            data = response.json()
             
             images = []
             for item in data.get('fotos', []):
@@ -53,6 +55,7 @@ class AgenciaBrasilService:
             return images
         except Exception as e:
             print(f"Erro ao buscar Agência Brasil: {e}")
+            report_error(e)
             return []
 
 agencia_brasil_service = AgenciaBrasilService()
\ No newline at end of file
@@ -0,0 +1,61 @@
+from typing import Dict
+from config import get_settings
+from services.latency_tracker import latency_tracker
+
+
+class AllocationStats:
+    """Histórico de rendimento por fonte (itens entregues / itens pedidos, média móvel exponencial)"""
+    def __init__(self):
+        self.settings = get_settings()
+        self._yield: Dict[str, float] = {}
+
+    def record(self, source: str, requested: int, delivered: int):
+        if requested <= 0:
+            return
+        ratio = min(1.0, delivered / requested)
+        previous = self._yield.get(source)
+        if previous is None:
+            self._yield[source] = ratio
+        else:
+            self._yield[source] = previous + self.settings.allocation_ewma_alpha * (ratio - previous)
+
+    def weight(self, source: str) -> float:
+        """Peso da fonte na divisão do per_page: rendimento histórico penalizado pela latência mediana"""
+        yield_ratio = self._yield.get(source, 1.0)
+        p50 = latency_tracker.percentile(source, 50)
+        latency_factor = 1.0 if p50 is None else 1 / (1 + p50 / self.settings.allocation_latency_ref_s)
+        return max(yield_ratio * latency_factor, self.settings.allocation_min_weight)
+
+    def snapshot(self) -> dict:
+        return {
+            source: {'yield': round(ratio, 3), 'weight': round(self.weight(source), 3)}
+            for source, ratio in self._yield.items()
+        }
+
+
+def allocate(total: int, weights: Dict[str, float]) -> Dict[str, int]:
+    """Divide `total` proporcionalmente aos pesos (maiores restos), com piso de 1 por fonte quando couber"""
+    sources = list(weights)
+    if total <= 0 or not sources:
+        return {source: 0 for source in sources}
+
+    if total < len(sources):
+        ranked = sorted(sources, key=lambda source: weights[source], reverse=True)[:total]
+        return {source: int(source in ranked) for source in sources}
+
+    # O piso mantém todas as fontes sendo medidas, mesmo as de peso baixo
+    shares = {source: 1 for source in sources}
+    remaining = total - len(sources)
+    weight_sum = sum(weights.values())
+    exact = {source: remaining * weights[source] / weight_sum for source in sources}
+    for source in sources:
+        shares[source] += int(exact[source])
+
+    leftover = total - sum(shares.values())
+    by_remainder = sorted(sources, key=lambda source: exact[source] - int(exact[source]), reverse=True)
+    for source in by_remainder[:leftover]:
+        shares[source] += 1
+    return shares
+
+
+allocation_stats = AllocationStats()
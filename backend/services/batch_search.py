@@ -0,0 +1,87 @@
+import asyncio
+import math
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from config import get_settings
+from services.search_orchestrator import SourceCall
+
+BatchResult = Tuple[int, str, Any, Optional[BaseException]]
+
+
+class BatchScheduler:
+    """Busca em lote: todas as chamadas (query x fonte), de todos os lotes em andamento, passam
+    por um único limite de concorrência (batch_max_concurrency).
+
+    Cada lote só inicia queries enquanto há vagas para as fontes dela; assim o prazo de cada
+    query (deadline_ms) corre a partir do momento em que ela de fato começa, não da fila do lote.
+    Cache e single-flight são os mesmos de /api/search.
+    """
+    def __init__(self):
+        self.settings = get_settings()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._waiting = 0
+        self._active = 0
+        self._counters = {'batches': 0, 'queries': 0, 'failed': 0, 'cancelled': 0, 'calls': 0}
+
+    def limited(self, make_call: SourceCall) -> SourceCall:
+        """Passa cada chamada de fonte pelo limite global"""
+        async def call(source: str):
+            if self._slots is None:
+                self._slots = asyncio.Semaphore(self.settings.batch_max_concurrency)
+            self._waiting += 1
+            try:
+                await self._slots.acquire()
+            finally:
+                self._waiting -= 1
+            self._active += 1
+            self._counters['calls'] += 1
+            try:
+                return await make_call(source)
+            finally:
+                self._active -= 1
+                self._slots.release()
+        return call
+
+    async def run(self, queries: List[str], source_count: int,
+                  run_query: Callable[[str], Awaitable[Any]]) -> AsyncIterator[BatchResult]:
+        """Executa as queries e entrega (índice, query, resultado, erro) na ordem em que terminam"""
+        self._counters['batches'] += 1
+        window = max(1, math.ceil(self.settings.batch_max_concurrency / max(1, source_count)))
+        pending = iter(enumerate(queries))
+        running: Dict[asyncio.Task, Tuple[int, str]] = {}
+
+        def launch():
+            while len(running) < window:
+                entry = next(pending, None)
+                if entry is None:
+                    return
+                running[asyncio.ensure_future(run_query(entry[1]))] = entry
+                self._counters['queries'] += 1
+
+        launch()
+        try:
+            while running:
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                finished = []
+                for task in done:
+                    index, query = running.pop(task)
+                    error = task.exception()
+                    if error is not None:
+                        self._counters['failed'] += 1
+                    finished.append((index, query, None if error is not None else task.result(), error))
+                # Repõe a janela antes de entregar: o envio ao cliente não segura as próximas queries
+                launch()
+                for result in finished:
+                    yield result
+        finally:
+            # Cliente desconectou: as queries ainda não entregues são canceladas
+            for task in running:
+                task.cancel()
+                self._counters['cancelled'] += 1
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {**self._counters, 'calls_active': self._active, 'calls_waiting': self._waiting}
+
+
+batch_scheduler = BatchScheduler()
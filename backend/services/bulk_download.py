@@ -0,0 +1,213 @@
+import asyncio
+import csv
+import mimetypes
+import os
+import re
+import tempfile
+import time
+import zipfile
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlsplit
+from config import get_settings
+from schemas import BulkDownloadItem
+from services.compact_records import CompactImage
+from services.http_client import http_client
+from services.image_registry import image_registry
+from services.unsplash_service import unsplash_service
+
+MANIFEST_FIELDS = ('file', 'source', 'image_id', 'title', 'photographer', 'photographer_url', 'license',
+                   'source_url', 'download_url', 'status')
+_UNSAFE_NAME = re.compile(r'[^\w.-]+')
+# Fontes cujo download_url aponta para a API (JSON com a URL do arquivo), não para o arquivo
+DOWNLOAD_RESOLVERS: Dict[str, Callable[[str], Awaitable[Optional[str]]]] = {
+    'unsplash': unsplash_service.resolve_download
+}
+
+
+class _Sink:
+    """Destino do ZipFile sem seek: acumula o que foi escrito até o próximo drain()"""
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def write(self, data) -> int:
+        self._buffer += data
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+class _TextWriter:
+    """csv.writer sobre um arquivo binário (o SpooledTemporaryFile do manifesto)"""
+    def __init__(self, file):
+        self._file = file
+
+    def write(self, text: str) -> int:
+        return self._file.write(text.encode('utf-8'))
+
+
+class _Fetched(NamedTuple):
+    index: int
+    item: BulkDownloadItem
+    record: Optional[CompactImage]
+    url: Optional[str]
+    file: Optional[tempfile.SpooledTemporaryFile]
+    size: int
+    extension: str
+    status: str
+
+
+def _extension(content_type: str, url: str) -> str:
+    extension = mimetypes.guess_extension(content_type.split(';')[0].strip()) if content_type else None
+    if not extension:
+        extension = os.path.splitext(urlsplit(url).path)[1]
+    extension = extension.lstrip('.').lower()
+    return {'jpeg': 'jpg', 'jpe': 'jpg'}.get(extension, extension) if extension.isalnum() else 'jpg'
+
+
+class BulkDownloader:
+    """ZIP de várias imagens montado enquanto é enviado.
+
+    Até bulk_download_concurrency arquivos ficam em voo ao mesmo tempo (baixando ou esperando a
+    vez de entrar no ZIP), cada um num SpooledTemporaryFile: a memória depende da concorrência,
+    não do número de imagens. Entradas entram no ZIP na ordem em que terminam, sem compressão
+    (imagens já são comprimidas), e o manifest.csv com licença e fotógrafo fecha o arquivo.
+    """
+    def __init__(self):
+        self.settings = get_settings()
+        self._counters = {'archives': 0, 'files': 0, 'failed': 0, 'bytes': 0}
+
+    async def _fetch(self, index: int, item: BulkDownloadItem) -> _Fetched:
+        record = await image_registry.lookup(item.source, item.image_id)
+        if record is None:
+            return _Fetched(index, item, None, item.download_url, None, 0, '', 'imagem desconhecida')
+        # Só URLs da própria imagem: o cliente escolhe a variante, não o destino
+        urls = [url for url in (record.download_url, record.raw_url, record.regular_url) if url]
+        url = item.download_url or (urls[0] if urls else None)
+        if url not in urls:
+            return _Fetched(index, item, record, url, None, 0, '', 'URL não pertence à imagem')
+        resolve = DOWNLOAD_RESOLVERS.get(record.source)
+        if resolve is not None and url == record.download_url:
+            # download_url é um endpoint da API da fonte (com autenticação), não o arquivo
+            url = await resolve(url) or record.raw_url or record.regular_url
+            if not url:
+                return _Fetched(index, item, record, record.download_url, None, 0, '', 'download indisponível')
+
+        spool = tempfile.SpooledTemporaryFile(max_size=self.settings.bulk_download_spool_bytes)
+        size = 0
+        complete = False
+        try:
+            async with http_client.client.stream(
+                'GET', url, timeout=self.settings.bulk_download_timeout_s, follow_redirects=True
+            ) as response:
+                response.raise_for_status()
+                extension = _extension(response.headers.get('content-type', ''), url)
+                async for chunk in response.aiter_bytes(self.settings.bulk_download_chunk_bytes):
+                    size += len(chunk)
+                    if size > self.settings.bulk_download_max_file_bytes:
+                        raise ValueError(f"maior que {self.settings.bulk_download_max_file_bytes} bytes")
+                    spool.write(chunk)
+            complete = True
+        except Exception as e:
+            return _Fetched(index, item, record, url, None, 0, '', f"erro: {e!r}")
+        finally:
+            # Erro ou cancelamento no meio do download: o arquivo temporário não chega ao ZIP
+            if not complete:
+                spool.close()
+        return _Fetched(index, item, record, url, spool, size, extension, 'ok')
+
+    async def _worker(self, items: Iterator[Tuple[int, BulkDownloadItem]], slots: asyncio.Semaphore,
+                      done: asyncio.Queue):
+        # O iterador é compartilhado entre os workers; a vaga só é liberada depois de o arquivo entrar no ZIP
+        for index, item in items:
+            await slots.acquire()
+            try:
+                fetched = await self._fetch(index, item)
+            except Exception as e:
+                fetched = _Fetched(index, item, None, item.download_url, None, 0, '', f"erro: {e!r}")
+            await done.put(fetched)
+
+    def _entry_name(self, fetched: _Fetched) -> str:
+        image_id = _UNSAFE_NAME.sub('_', fetched.item.image_id)[:80]
+        source = _UNSAFE_NAME.sub('_', fetched.item.source)
+        return f"{fetched.index + 1:04d}_{source}_{image_id}.{fetched.extension}"
+
+    def _write_entry(self, archive: zipfile.ZipFile, sink: _Sink, name: str, file) -> Iterator[bytes]:
+        info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+        info.compress_type = zipfile.ZIP_STORED
+        # Tamanho conhecido: o zipfile decide sozinho se a entrada precisa de ZIP64
+        info.file_size = file.seek(0, os.SEEK_END)
+        file.seek(0)
+        with archive.open(info, 'w') as entry:
+            while chunk := file.read(self.settings.bulk_download_chunk_bytes):
+                entry.write(chunk)
+                yield sink.drain()
+        yield sink.drain()
+
+    async def stream(self, items: List[BulkDownloadItem]) -> AsyncIterator[bytes]:
+        self._counters['archives'] += 1
+        sink = _Sink()
+        archive = zipfile.ZipFile(sink, 'w', zipfile.ZIP_STORED)
+        manifest = tempfile.SpooledTemporaryFile(
+            max_size=self.settings.bulk_download_spool_bytes, mode='w+b'
+        )
+        manifest_writer = csv.writer(_TextWriter(manifest))
+        manifest_writer.writerow(MANIFEST_FIELDS)
+
+        slots = asyncio.Semaphore(self.settings.bulk_download_concurrency)
+        done: asyncio.Queue = asyncio.Queue()
+        pending = iter(enumerate(items))
+        workers = [asyncio.create_task(self._worker(pending, slots, done))
+                   for _ in range(min(self.settings.bulk_download_concurrency, len(items)))]
+        try:
+            for _ in range(len(items)):
+                fetched = await done.get()
+                name = ''
+                try:
+                    if fetched.file is not None:
+                        name = self._entry_name(fetched)
+                        for data in self._write_entry(archive, sink, name, fetched.file):
+                            if data:
+                                yield data
+                        self._counters['files'] += 1
+                        self._counters['bytes'] += fetched.size
+                    else:
+                        self._counters['failed'] += 1
+                finally:
+                    if fetched.file is not None:
+                        fetched.file.close()
+                    slots.release()
+                record = fetched.record
+                manifest_writer.writerow((
+                    name, fetched.item.source, fetched.item.image_id,
+                    record.title if record else '', record.photographer if record else '',
+                    record.photographer_url if record else '', record.license if record else '',
+                    record.source_url if record else '', fetched.url or '', fetched.status
+                ))
+
+            for data in self._write_entry(archive, sink, 'manifest.csv', manifest):
+                if data:
+                    yield data
+            archive.close()
+            yield sink.drain()
+        finally:
+            # Cliente desconectou (ou erro): para os downloads e libera os arquivos já baixados
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            while not done.empty():
+                fetched = done.get_nowait()
+                if fetched.file is not None:
+                    fetched.file.close()
+            manifest.close()
+
+    def stats(self) -> dict:
+        return dict(self._counters)
+
+
+bulk_downloader = BulkDownloader()
@@ -0,0 +1,168 @@
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+from config import get_settings
+from schemas import ImageSource
+from services.compact_records import CompactImage, pack_images, unpack_images
+from services.database import database
+
+
+class ResultCache:
+    """Cache de resultados por fonte: LRU em memória na frente de uma coleção MongoDB com TTL"""
+    def __init__(self):
+        self.settings = get_settings()
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._pending_writes = set()
+        # Entradas trazidas pelo prefetch que ainda não foram lidas por uma busca
+        self._prefetched = set()
+        self._counters = {
+            'memory_hits': 0,
+            'mongo_hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'mongo_errors': 0,
+            'prefetch_stores': 0,
+            'prefetch_hits': 0,
+            'prefetch_wasted': 0
+        }
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        return " ".join(query.lower().split())
+
+    def make_key(self, source: str, query: str, page: int, per_page: int, order_by: str) -> str:
+        return f"{source}|{self.normalize_query(query)}|{page}|{per_page}|{order_by}"
+
+    def ttl_for(self, source: str) -> int:
+        return self.settings.cache_ttl_seconds.get(source, self.settings.cache_default_ttl_seconds)
+
+    @property
+    def _collection(self):
+        return database.db[self.settings.cache_collection]
+
+    def _mongo_available(self) -> bool:
+        return self.settings.cache_mongo_enabled and database.available()
+
+    def _mongo_failed(self, e: Exception):
+        self._counters['mongo_errors'] += 1
+        database.mark_failed(e, "cache")
+
+    async def ensure_indexes(self):
+        """Cria o índice TTL (expiração por documento, via campo expires_at)"""
+        if not self.settings.cache_enabled or not self._mongo_available():
+            return
+        try:
+            await self._collection.create_index("expires_at", expireAfterSeconds=0)
+        except Exception as e:
+            self._mongo_failed(e)
+
+    def _drop_prefetched(self, key: str):
+        if key in self._prefetched:
+            self._prefetched.discard(key)
+            self._counters['prefetch_wasted'] += 1
+
+    def _memory_get(self, key: str) -> Optional[List[CompactImage]]:
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        expires_at, records = entry
+        if expires_at < time.monotonic():
+            del self._memory[key]
+            self._drop_prefetched(key)
+            return None
+        self._memory.move_to_end(key)
+        return records
+
+    def _memory_set(self, key: str, records: List[CompactImage], ttl: float):
+        self._memory[key] = (time.monotonic() + ttl, records)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.settings.cache_memory_max_entries:
+            evicted, _ = self._memory.popitem(last=False)
+            self._drop_prefetched(evicted)
+
+    async def get(self, source: str, key: str) -> Optional[List[ImageSource]]:
+        if not self.settings.cache_enabled:
+            return None
+
+        records = self._memory_get(key)
+        if records is not None:
+            self._counters['memory_hits'] += 1
+            if key in self._prefetched:
+                self._prefetched.discard(key)
+                self._counters['prefetch_hits'] += 1
+            return unpack_images(records)
+
+        if self._mongo_available():
+            try:
+                doc = await self._collection.find_one({'_id': key})
+            except Exception as e:
+                self._mongo_failed(e)
+                doc = None
+            now = datetime.now(timezone.utc)
+            # O TTL do Mongo roda a cada ~60s, então documentos vencidos ainda podem aparecer
+            if doc is not None and doc['expires_at'].replace(tzinfo=timezone.utc) > now:
+                records = [CompactImage.from_dict(item) for item in doc['images']]
+                remaining = (doc['expires_at'].replace(tzinfo=timezone.utc) - now).total_seconds()
+                self._memory_set(key, records, remaining)
+                self._counters['mongo_hits'] += 1
+                return unpack_images(records)
+
+        self._counters['misses'] += 1
+        return None
+
+    async def contains(self, key: str) -> bool:
+        """Se a chave tem entrada válida (sem contar como hit nem miss)"""
+        if not self.settings.cache_enabled:
+            return False
+        if self._memory_get(key) is not None:
+            return True
+        if self._mongo_available():
+            try:
+                return await self._collection.count_documents(
+                    {'_id': key, 'expires_at': {'$gt': datetime.now(timezone.utc)}}, limit=1
+                ) > 0
+            except Exception as e:
+                self._mongo_failed(e)
+        return False
+
+    async def set(self, source: str, key: str, images: List[ImageSource], prefetched: bool = False):
+        # Lista vazia normalmente significa erro ou fonte não configurada: não guardar
+        if not self.settings.cache_enabled or not images:
+            return
+
+        ttl = self.ttl_for(source)
+        records = pack_images(images)
+        self._memory_set(key, records, ttl)
+        self._counters['stores'] += 1
+        if prefetched:
+            self._prefetched.add(key)
+            self._counters['prefetch_stores'] += 1
+        else:
+            self._prefetched.discard(key)
+
+        if self._mongo_available():
+            # Escrita em segundo plano para não atrasar a resposta
+            task = asyncio.create_task(self._mongo_set(source, key, records, ttl))
+            self._pending_writes.add(task)
+            task.add_done_callback(self._pending_writes.discard)
+
+    async def _mongo_set(self, source: str, key: str, records: List[CompactImage], ttl: int):
+        now = datetime.now(timezone.utc)
+        doc = {
+            'source': source,
+            'images': [record.to_dict() for record in records],
+            'created_at': now,
+            'expires_at': now + timedelta(seconds=ttl)
+        }
+        try:
+            await self._collection.replace_one({'_id': key}, doc, upsert=True)
+        except Exception as e:
+            self._mongo_failed(e)
+
+    def stats(self) -> dict:
+        return {**self._counters, 'memory_entries': len(self._memory), 'prefetched_unread': len(self._prefetched)}
+
+
+result_cache = ResultCache()
@@ -0,0 +1,114 @@
+import time
+from collections import deque
+from typing import Dict
+from config import get_settings
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """A fonte está com o circuito aberto e foi pulada sem chamada externa"""
+    def __init__(self, source: str):
+        super().__init__(f"{source}: circuit open")
+        self.source = source
+
+
+class CircuitBreaker:
+    """Abre após falhas consecutivas ou taxa de erro alta; em half-open deixa passar uma única sonda"""
+    def __init__(self, source: str):
+        self.settings = get_settings()
+        self.source = source
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._probe_in_flight = False
+        self._window = deque(maxlen=self.settings.circuit_window_size)
+
+    @property
+    def error_rate(self) -> float:
+        if not self._window:
+            return 0.0
+        return self._window.count(False) / len(self._window)
+
+    def allow(self) -> bool:
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.settings.circuit_open_seconds:
+                return False
+            self.state = HALF_OPEN
+            self._probe_in_flight = False
+        # HALF_OPEN: apenas uma chamada de sonda por vez
+        if self._probe_in_flight:
+            return False
+        self._probe_in_flight = True
+        return True
+
+    def release(self):
+        """Libera a sonda do half-open quando a chamada nem chegou a sair (ex.: cota esgotada)"""
+        if self.state == HALF_OPEN:
+            self._probe_in_flight = False
+
+    def record_success(self):
+        self._window.append(True)
+        self.consecutive_failures = 0
+        if self.state == HALF_OPEN:
+            self._close()
+
+    def record_failure(self):
+        self._window.append(False)
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN:
+            self._open()
+        elif self.state == CLOSED and self._should_open():
+            self._open()
+
+    def _should_open(self) -> bool:
+        if self.consecutive_failures >= self.settings.circuit_failure_threshold:
+            return True
+        return (len(self._window) >= self.settings.circuit_min_calls
+                and self.error_rate >= self.settings.circuit_error_rate_threshold)
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.times_opened += 1
+        self._probe_in_flight = False
+
+    def _close(self):
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+        self._window.clear()
+
+    def snapshot(self) -> dict:
+        retry_in = None
+        if self.state == OPEN:
+            retry_in = max(0.0, self.settings.circuit_open_seconds - (time.monotonic() - self.opened_at))
+        return {
+            'state': self.state,
+            'consecutive_failures': self.consecutive_failures,
+            'error_rate': round(self.error_rate, 3),
+            'times_opened': self.times_opened,
+            'retry_in_s': retry_in
+        }
+
+
+class CircuitBreakerRegistry:
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, source: str) -> CircuitBreaker:
+        breaker = self._breakers.get(source)
+        if breaker is None:
+            breaker = self._breakers[source] = CircuitBreaker(source)
+        return breaker
+
+    def items(self):
+        return self._breakers.items()
+
+
+circuit_breakers = CircuitBreakerRegistry()
@@ -1,7 +1,8 @@
-import httpx
 from typing import List
 from config import get_settings
 from schemas import ImageSource
+from services.http_client import http_client
+from services.provider_call import call_timeout, report_error
 
 class FabioColombiniService:
     """Fabio Colombini - Fotografia de natureza"""
@@ -24,15 +25,15 @@ class FabioColombiniService:
                 'per_page': min(per_page, 50)
             }
             
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/api/search",
-                    headers=headers,
-                    params=params,
-                    timeout=10.0
-                )
-                response.raise_for_status()
-                data = response.json()
+            client = http_client.client
+            response = await client.get(
+                f"{self.base_url}/api/search",
+                headers=headers,
+                params=params,
+                timeout=call_timeout(10.0)
+            )
+            response.raise_for_status()
+            data = response.json()
             
             images = []
             for item in data.get('photos', []):
@@ -53,6 +54,7 @@ class FabioColombiniService:
             return images
         except Exception as e:
             print(f"Erro ao buscar Fabio Colombini: {e}")
+            report_error(e)
             return []
 
 colombini_service = FabioColombiniService()
\ No newline at end of file
@@ -0,0 +1,56 @@
+import sys
+from operator import attrgetter
+from typing import List, Optional
+from schemas import ImageSource
+
+FIELDS = tuple(ImageSource.model_fields)
+# Campos com poucos valores distintos, repetidos em toda a página (e entre páginas)
+INTERNED_FIELDS = ('source', 'license', 'photographer', 'photographer_url')
+URL_FIELDS = ('thumbnail_url', 'regular_url', 'raw_url', 'download_url', 'source_url')
+
+_get_values = attrgetter(*FIELDS)
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if type(value) is str else value
+
+
+class CompactImage:
+    """ImageSource em forma compacta para o cache em memória e índices locais.
+
+    Um ImageSource carrega __dict__ e __pydantic_fields_set__ próprios (~1,2 KB por item além das
+    strings); aqui são só os slots. Campos "enum" (source, license, fotógrafo) são internados e URLs
+    iguais dentro do item (regular/raw/download costumam coincidir) apontam para a mesma string.
+    """
+    __slots__ = FIELDS
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CompactImage":
+        record = cls.__new__(cls)
+        seen_urls = {}
+        for field in FIELDS:
+            value = data.get(field)
+            if field in INTERNED_FIELDS:
+                value = _intern(value)
+            elif value and field in URL_FIELDS:
+                value = seen_urls.setdefault(value, value)
+            setattr(record, field, value)
+        return record
+
+    @classmethod
+    def pack(cls, image: ImageSource) -> "CompactImage":
+        return cls.from_dict(image.__dict__)
+
+    def to_dict(self) -> dict:
+        return dict(zip(FIELDS, _get_values(self)))
+
+    def to_image(self) -> ImageSource:
+        return ImageSource(**self.to_dict())
+
+
+def pack_images(images: List[ImageSource]) -> List[CompactImage]:
+    return [CompactImage.pack(image) for image in images]
+
+
+def unpack_images(records: List[CompactImage]) -> List[ImageSource]:
+    return [record.to_image() for record in records]
@@ -1,7 +1,8 @@
-import httpx
 from typing import List
 from config import get_settings
 from schemas import ImageSource
+from services.http_client import http_client
+from services.provider_call import call_timeout, report_error
 
 class CreativeCommonsService:
     """Creative Commons Search - busca em Flickr, Wikimedia Commons, etc."""
@@ -21,14 +22,15 @@ class CreativeCommonsService:
             if license_type:
                 params['license_type'] = license_type
             
-            async with httpx.AsyncClient(follow_redirects=True) as client:
-                response = await client.get(
-                    f"{self.base_url}/images",
-                    params=params,
-                    timeout=15.0
-                )
-                response.raise_for_status()
-                data = response.json()
+            client = http_client.client
+            response = await client.get(
+                f"{self.base_url}/images",
+                params=params,
+                timeout=call_timeout(15.0),
+                follow_redirects=True
+            )
+            response.raise_for_status()
+            data = response.json()
             
             images = []
             for result in data.get('results', []):
@@ -52,6 +54,7 @@ class CreativeCommonsService:
             return images
         except Exception as e:
             print(f"Erro ao buscar Creative Commons: {e}")
+            report_error(e)
             return []
     
     def _parse_license(self, license_str: str) -> str:
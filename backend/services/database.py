@@ -0,0 +1,39 @@
+import time
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from typing import Optional
+from config import get_settings
+
+
+class Database:
+    """Conexão MongoDB (motor) compartilhada pela aplicação"""
+    def __init__(self):
+        self.settings = get_settings()
+        self._client: Optional[AsyncIOMotorClient] = None
+        self._retry_at = 0.0
+
+    @property
+    def db(self) -> AsyncIOMotorDatabase:
+        # O motor só conecta na primeira operação, então criar aqui é barato
+        if self._client is None:
+            self._client = AsyncIOMotorClient(
+                self.settings.mongo_url,
+                serverSelectionTimeoutMS=self.settings.mongo_timeout_ms,
+                connectTimeoutMS=self.settings.mongo_timeout_ms
+            )
+        return self._client[self.settings.db_name]
+
+    def available(self) -> bool:
+        """False durante o back-off após uma falha, para não pagar o timeout do Mongo a cada chamada"""
+        return time.monotonic() >= self._retry_at
+
+    def mark_failed(self, e: Exception, context: str):
+        self._retry_at = time.monotonic() + self.settings.mongo_retry_seconds
+        print(f"Erro no MongoDB ({context}): {e}")
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+        self._client = None
+
+
+database = Database()
@@ -0,0 +1,118 @@
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+from schemas import ImageSource, SourceRef
+
+URL_FIELDS = ('regular_url', 'raw_url', 'download_url', 'source_url')
+# Fontes que compartilham o mesmo espaço de ids (Getty e iStock usam api.gettyimages.com/v3)
+ID_NAMESPACES = {'getty_images': 'getty', 'istock': 'getty'}
+
+_WIKIMEDIA_THUMB = re.compile(r'^/wikipedia/([^/]+)/thumb/(.+?)/[^/]+$')
+_GETTY_MEDIA = re.compile(r'^/id/(\d+)/')
+_PEXELS_PHOTO = re.compile(r'^/photos/(\d+)/')
+_FLICKR_FILE = re.compile(r'/(\d+)_[0-9a-f]+(?:_[a-z0-9]+)?\.\w+$')
+_SIZE_SUFFIX = re.compile(r'_\d{2,4}(\.\w+)$')
+
+
+def canonical_url(url: Optional[str]) -> Optional[str]:
+    """Forma canônica de uma URL de imagem: sem query/fragmento, sem "www." e sem variantes de tamanho/CDN"""
+    if not url:
+        return None
+    try:
+        parts = urlsplit(url.strip())
+        host = (parts.hostname or '').lower()
+    except ValueError:
+        return None
+    if parts.scheme not in ('http', 'https') or not host:
+        return None
+    if host.startswith('www.'):
+        host = host[4:]
+    path = parts.path
+
+    if host in ('media.gettyimages.com', 'media.istockphoto.com'):
+        match = _GETTY_MEDIA.match(path)
+        if match:
+            return f"getty:{match.group(1)}"
+    if host == 'images.pexels.com':
+        match = _PEXELS_PHOTO.match(path)
+        if match:
+            return f"pexels:{match.group(1)}"
+    if host.endswith('staticflickr.com'):
+        match = _FLICKR_FILE.search(path)
+        if match:
+            return f"flickr:{match.group(1)}"
+    if host == 'upload.wikimedia.org':
+        path = _WIKIMEDIA_THUMB.sub(r'/wikipedia/\1/\2', path)
+    elif host == 'cdn.pixabay.com':
+        path = _SIZE_SUFFIX.sub(r'\1', path)
+    return f"{host}{path.rstrip('/')}"
+
+
+def source_ref(source: str, image: ImageSource) -> SourceRef:
+    return SourceRef(source=source, source_url=image.source_url, image_id=image.image_id, license=image.license)
+
+
+class Deduplicator:
+    """Deduplicação por requisição: cada imagem vira um conjunto de chaves (URLs canônicas + id nativo)
+    e a primeira imagem com uma chave já vista absorve a nova como fonte alternativa.
+
+    URLs repetidas em mais de uma imagem do mesmo lote de uma fonte são ignoradas como chave:
+    normalmente são valores de fallback (ex.: a URL base da API), não identidade da imagem.
+    """
+    def __init__(self):
+        # chave -> índice do grupo; id() da imagem mantida -> índice do grupo
+        self._owners: Dict[str, int] = {}
+        self._groups: Dict[int, int] = {}
+        self._refs: List[List[SourceRef]] = []
+        self.removed = 0
+
+    @staticmethod
+    def _url_keys(image: ImageSource) -> Set[str]:
+        keys = {canonical_url(getattr(image, field)) for field in URL_FIELDS}
+        keys.discard(None)
+        return keys
+
+    def _keys(self, source: str, image: ImageSource, repeated: Set[str]) -> Set[str]:
+        keys = self._url_keys(image) - repeated
+        if image.image_id:
+            keys.add(f"id:{ID_NAMESPACES.get(source, source)}:{image.image_id}")
+        return keys
+
+    def add_batch(self, source: str, images: List[ImageSource]) -> List[ImageSource]:
+        """Registra um lote da fonte e devolve só as imagens inéditas"""
+        # Cada chave conta uma vez por imagem: adapters repetem a mesma URL em vários campos
+        counts = Counter(key for image in images for key in self._url_keys(image))
+        repeated = {key for key, count in counts.items() if key and count > 1}
+        fresh = []
+        for image in images:
+            keys = self._keys(source, image, repeated)
+            owner = next((self._owners[key] for key in keys if key in self._owners), None)
+            if owner is None:
+                owner = len(self._refs)
+                self._groups[id(image)] = owner
+                self._refs.append([source_ref(source, image)])
+                fresh.append(image)
+            else:
+                self.removed += 1
+                self._refs[owner].append(source_ref(source, image))
+            for key in keys:
+                self._owners.setdefault(key, owner)
+        return fresh
+
+    def collapsed(self, image: ImageSource) -> ImageSource:
+        """A imagem mantida, com `sources` listando todas as fontes onde apareceu (se mais de uma)"""
+        index = self._groups.get(id(image))
+        refs = self._refs[index] if index is not None else None
+        if not refs or len(refs) < 2:
+            return image
+        # Cópia: a mesma instância pode estar sendo compartilhada por outras requisições (single-flight)
+        return image.model_copy(update={'sources': refs})
+
+
+def dedupe(results: Dict[str, List[ImageSource]], source_list: List[str]) -> Tuple[Dict[str, List[ImageSource]], int]:
+    """Remove duplicatas entre (e dentro de) as fontes, mantendo a primeira na ordem de source_list"""
+    deduplicator = Deduplicator()
+    fresh = {source: deduplicator.add_batch(source, results.get(source, [])) for source in source_list}
+    unique = {source: [deduplicator.collapsed(image) for image in images] for source, images in fresh.items()}
+    return unique, deduplicator.removed
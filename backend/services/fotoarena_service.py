@@ -1,7 +1,8 @@
-import httpx
 from typing import List
 from config import get_settings
 from schemas import ImageSource
+from services.http_client import http_client
+from services.provider_call import call_timeout, report_error
 
 class FotoArenaService:
     """Foto Arena - Banco de imagens brasileiro"""
@@ -24,15 +25,15 @@ class FotoArenaService:
                 'per_page': min(per_page, 50)
             }
             
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/api/search",
-                    headers=headers,
-                    params=params,
-                    timeout=10.0
-                )
-                response.raise_for_status()
-                data = response.json()
+            client = http_client.client
+            response = await client.get(
+                f"{self.base_url}/api/search",
+                headers=headers,
+                params=params,
+                timeout=call_timeout(10.0)
+            )
+            response.raise_for_status()
+            data = response.json()
             
             images = []
             for item in data.get('results', []):
@@ -53,6 +54,7 @@ class FotoArenaService:
             return images
         except Exception as e:
             print(f"Erro ao buscar Foto Arena: {e}")
+            report_error(e)
             return []
 
 fotoarena_service = FotoArenaService()
\ No newline at end of file
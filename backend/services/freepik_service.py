@@ -1,7 +1,9 @@
-import httpx
 from typing import List
 from config import get_settings
 from schemas import ImageSource
+from services.http_client import http_client
+from services.provider_call import call_timeout, report_error
+from services.timestamps import normalize_timestamp
 
 class FreepikService:
     def __init__(self):
@@ -23,15 +25,16 @@ class FreepikService:
                 'limit': min(per_page, 200)
             }
             
-            async with httpx.AsyncClient(follow_redirects=True) as client:
-                response = await client.get(
-                    f"{self.base_url}/v1/resources/search",
-                    headers=headers,
-                    params=params,
-                    timeout=15.0
-                )
-                response.raise_for_status()
-                data = response.json()
+            client = http_client.client
+            response = await client.get(
+                f"{self.base_url}/v1/resources/search",
+                headers=headers,
+                params=params,
+                timeout=call_timeout(15.0),
+                follow_redirects=True
+            )
+            response.raise_for_status()
+            data = response.json()
             
             images = []
             for resource in data.get('data', []):
@@ -47,11 +50,13 @@ class FreepikService:
                     source_url=resource.get('url', ''),
                     download_url=resource.get('url', ''),
                     license='free' if resource.get('premium', False) == False else 'paid',
-                    image_id=str(resource.get('id', ''))
+                    image_id=str(resource.get('id', '')),
+                    published_at=normalize_timestamp(resource.get('meta', {}).get('published_at'))
                 ))
             return images
         except Exception as e:
             print(f"Erro ao buscar Freepik: {e}")
+            report_error(e)
             return []
 
 freepik_service = FreepikService()
\ No newline at end of file
@@ -1,7 +1,9 @@
-import httpx
 from typing import List
 from config import get_settings
 from schemas import ImageSource
+from services.http_client import http_client
+from services.provider_call import call_timeout, report_error
+from services.timestamps import normalize_timestamp
 import base64
 
 class GettyImagesService:
@@ -9,7 +11,7 @@ class GettyImagesService:
         self.settings = get_settings()
         self.base_url = "https://api.gettyimages.com/v3"
     
-    async def search_images(self, query: str, page: int = 1, per_page: int = 20) -> List[ImageSource]:
+    async def search_images(self, query: str, page: int = 1, per_page: int = 20, order_by: str = 'relevant') -> List[ImageSource]:
         if not self.settings.getty_images_api_key:
             return []
         
@@ -22,22 +24,30 @@ class GettyImagesService:
                 'Api-Key': self.settings.getty_images_api_key,
                 'Accept': 'application/json'
             }
+            # Mapear order_by para o sort_order da API Getty
+            sort_order = 'best_match'
+            if order_by == 'latest':
+                sort_order = 'newest'
+            elif order_by == 'oldest':
+                sort_order = 'oldest'
+            
             params = {
                 'phrase': query,
                 'page': page,
                 'page_size': min(per_page, 100),
-                'fields': 'id,title,caption,display_sizes'
+                'fields': 'id,title,caption,display_sizes,date_created',
+                'sort_order': sort_order
             }
             
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/search/images",
-                    headers=headers,
-                    params=params,
-                    timeout=10.0
-                )
-                response.raise_for_status()
-                data = response.json()
+            client = http_client.client
+            response = await client.get(
+                f"{self.base_url}/search/images",
+                headers=headers,
+                params=params,
+                timeout=call_timeout(10.0)
+            )
+            response.raise_for_status()
+            data = response.json()
             
             images = []
             for item in data.get('images', []):
@@ -54,11 +64,13 @@ class GettyImagesService:
                     source_url=f"https://www.gettyimages.com/detail/{item['id']}",
                     download_url='',
                     license='paid',
-                    image_id=str(item['id'])
+                    image_id=str(item['id']),
+                    published_at=normalize_timestamp(item.get('date_created'))
                 ))
             return images
         except Exception as e:
             print(f"Erro ao buscar Getty Images: {e}")
+            report_error(e)
             return []
 
 getty_service = GettyImagesService()
\ No newline at end of file
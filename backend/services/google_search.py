@@ -1,7 +1,8 @@
-import httpx
 from typing import List
 from config import get_settings
 from schemas import ImageSource
+from services.http_client import http_client
+from services.provider_call import call_timeout, report_error
 
 class GoogleSearchService:
     def __init__(self):
@@ -23,10 +24,10 @@ class GoogleSearchService:
                 'num': min(per_page, 10)
             }
             
-            async with httpx.AsyncClient() as client:
-                response = await client.get(self.base_url, params=params, timeout=10.0)
-                response.raise_for_status()
-                data = response.json()
+            client = http_client.client
+            response = await client.get(self.base_url, params=params, timeout=call_timeout(10.0))
+            response.raise_for_status()
+            data = response.json()
             
             images = []
             if 'items' in data:
@@ -48,6 +49,7 @@ class GoogleSearchService:
             return images
         except Exception as e:
             print(f"Error searching Google Images: {e}")
+            report_error(e)
             return []
 
 google_service = GoogleSearchService()
\ No newline at end of file
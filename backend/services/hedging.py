@@ -0,0 +1,80 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+from config import get_settings
+from services.latency_tracker import latency_tracker
+from services.rate_limiter import rate_limiter
+
+
+class HedgingPolicy:
+    """Requisições "hedged": se a fonte não respondeu até o seu pXX, dispara uma cópia e usa a primeira resposta.
+
+    O número de cópias é limitado a uma fração (hedge_budget_ratio) das chamadas primárias de cada fonte.
+    """
+    def __init__(self):
+        self.settings = get_settings()
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    def _source_counters(self, source: str) -> Dict[str, int]:
+        counters = self._counters.get(source)
+        if counters is None:
+            counters = self._counters[source] = {'primary': 0, 'hedged': 0, 'hedge_wins': 0, 'budget_denied': 0,
+                                                       'rate_limited': 0}
+        return counters
+
+    def delay_for(self, source: str) -> Optional[float]:
+        """Atraso até disparar a cópia, ou None se a fonte não usa hedging (ou ainda não tem amostras)"""
+        percentile = self.settings.hedge_percentiles.get(source)
+        if not self.settings.hedging_enabled or percentile is None:
+            return None
+        return latency_tracker.percentile(source, percentile)
+
+    def _has_budget(self, counters: Dict[str, int]) -> bool:
+        # +1 permite a primeira cópia antes de haver volume suficiente
+        allowed = counters['primary'] * self.settings.hedge_budget_ratio + 1
+        if counters['hedged'] >= allowed:
+            counters['budget_denied'] += 1
+            return False
+        return True
+
+    async def run(self, source: str, make_call: Callable[[], Awaitable[Any]]) -> Any:
+        delay = self.delay_for(source)
+        if delay is None:
+            return await make_call()
+
+        counters = self._source_counters(source)
+        counters['primary'] += 1
+        primary = asyncio.ensure_future(make_call())
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done or not self._has_budget(counters):
+                return await primary
+            # A cópia também consome cota da fonte; o orçamento só é gasto se ela de fato sair
+            if not await rate_limiter.try_acquire(source):
+                counters['rate_limited'] += 1
+                return await primary
+
+            counters['hedged'] += 1
+            hedge = asyncio.ensure_future(make_call())
+            pending.add(hedge)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            # A primária cancelada entra como amostra censurada pelo fetch_provider
+                            counters['hedge_wins'] += 1
+                        return task.result()
+                    error = task.exception()
+            # As duas falharam: propaga o último erro
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> dict:
+        return {source: dict(counters) for source, counters in self._counters.items()}
+
+
+hedging_policy = HedgingPolicy()
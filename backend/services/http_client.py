@@ -0,0 +1,100 @@
+import httpx
+from typing import Awaitable, Callable, List, Optional
+from config import get_settings
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class HttpClientManager:
+    """Cliente HTTP compartilhado (pool keep-alive + HTTP/2) usado por todas as fontes"""
+    def __init__(self):
+        self.settings = get_settings()
+        self._client: Optional[httpx.AsyncClient] = None
+        self._request_hooks: List[Callable[[httpx.Request], Awaitable[None]]] = []
+        self._response_hooks: List[Callable[[httpx.Response], Awaitable[None]]] = []
+
+    def add_request_hook(self, hook: Callable[[httpx.Request], Awaitable[None]]):
+        """Registra um observador chamado antes de cada requisição (pode ajustar request.extensions)"""
+        self._request_hooks.append(hook)
+
+    async def _on_request(self, request: httpx.Request):
+        for hook in self._request_hooks:
+            await hook(request)
+
+    def add_response_hook(self, hook: Callable[[httpx.Response], Awaitable[None]]):
+        """Registra um observador chamado para toda resposta (no contexto da chamada da fonte)"""
+        self._response_hooks.append(hook)
+
+    async def _on_response(self, response: httpx.Response):
+        for hook in self._response_hooks:
+            await hook(response)
+
+    def _build_client(self) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=self.settings.http_max_connections,
+            max_keepalive_connections=self.settings.http_max_keepalive_connections,
+            keepalive_expiry=self.settings.http_keepalive_expiry
+        )
+        return httpx.AsyncClient(
+            limits=limits,
+            http2=self.settings.http2_enabled and HTTP2_AVAILABLE,
+            timeout=httpx.Timeout(10.0, connect=self.settings.http_connect_timeout),
+            headers={'User-Agent': 'LuminaSearchAPI/1.0'},
+            event_hooks={'request': [self._on_request], 'response': [self._on_response]}
+        )
+
+    async def start(self):
+        """Cria o cliente no startup da aplicação (lifespan)"""
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+
+    async def close(self):
+        """Fecha o pool de conexões no shutdown"""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Criação preguiçosa para uso fora do lifespan (scripts, testes)
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+        return self._client
+
+    def stats(self) -> dict:
+        """Estatísticas do pool de conexões (por host)"""
+        stats = {
+            'started': self._client is not None and not self._client.is_closed,
+            'http2': self.settings.http2_enabled and HTTP2_AVAILABLE,
+            'max_connections': self.settings.http_max_connections,
+            'max_keepalive_connections': self.settings.http_max_keepalive_connections,
+            'connections': 0,
+            'idle': 0,
+            'active': 0,
+            'http2_connections': 0,
+            'hosts': {}
+        }
+        if not stats['started']:
+            return stats
+
+        # httpx não expõe o pool publicamente; lemos o pool do httpcore
+        pool = getattr(getattr(self._client, '_transport', None), '_pool', None)
+        for connection in getattr(pool, 'connections', []):
+            origin = connection._origin
+            host = origin.host.decode() if origin else 'unknown'
+            host_stats = stats['hosts'].setdefault(host, {'connections': 0, 'idle': 0, 'active': 0})
+            state = 'idle' if connection.is_idle() else 'active'
+            stats['connections'] += 1
+            stats[state] += 1
+            host_stats['connections'] += 1
+            host_stats[state] += 1
+            if 'HTTP/2' in connection.info():
+                stats['http2_connections'] += 1
+        return stats
+
+
+http_client = HttpClientManager()
@@ -0,0 +1,46 @@
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+from config import get_settings
+from schemas import ImageSource
+from services.compact_records import CompactImage
+from services.local_index import local_index
+
+
+class ImageRegistry:
+    """Imagens recém-devolvidas ao cliente, por (source do item, image_id).
+
+    Endpoints que recebem só a identidade da imagem (miniaturas, download em lote) resolvem URLs
+    e metadados aqui, nunca a partir de uma URL arbitrária enviada pelo cliente. LRU em memória
+    (registros compactos) com o índice local como fallback para outros workers e restarts.
+    """
+    def __init__(self):
+        self.settings = get_settings()
+        self._images: "OrderedDict[Tuple[str, str], CompactImage]" = OrderedDict()
+        self._counters = {'memory_hits': 0, 'index_hits': 0, 'misses': 0}
+
+    def remember(self, images: List[ImageSource]):
+        for image in images:
+            if image.image_id:
+                key = (image.source, image.image_id)
+                self._images[key] = CompactImage.pack(image)
+                self._images.move_to_end(key)
+        while len(self._images) > self.settings.image_registry_max_entries:
+            self._images.popitem(last=False)
+
+    async def lookup(self, source: str, image_id: str) -> Optional[CompactImage]:
+        record = self._images.get((source, image_id))
+        if record is not None:
+            self._counters['memory_hits'] += 1
+            return record
+        image = await local_index.lookup(source, image_id)
+        if image is None:
+            self._counters['misses'] += 1
+            return None
+        self._counters['index_hits'] += 1
+        return CompactImage.pack(image)
+
+    def stats(self) -> dict:
+        return {**self._counters, 'entries': len(self._images)}
+
+
+image_registry = ImageRegistry()
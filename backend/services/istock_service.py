@@ -1,14 +1,16 @@
-import httpx
 from typing import List
 from config import get_settings
 from schemas import ImageSource
+from services.http_client import http_client
+from services.provider_call import call_timeout, report_error
+from services.timestamps import normalize_timestamp
 
 class iStockService:
     def __init__(self):
         self.settings = get_settings()
         self.base_url = "https://api.gettyimages.com/v3"
     
-    async def search_images(self, query: str, page: int = 1, per_page: int = 20) -> List[ImageSource]:
+    async def search_images(self, query: str, page: int = 1, per_page: int = 20, order_by: str = 'relevant') -> List[ImageSource]:
         if not self.settings.istock_api_key:
             return []
         
@@ -17,23 +19,31 @@ class iStockService:
                 'Api-Key': self.settings.istock_api_key,
                 'Accept': 'application/json'
             }
+            # Mapear order_by para o sort_order da API Getty
+            sort_order = 'best_match'
+            if order_by == 'latest':
+                sort_order = 'newest'
+            elif order_by == 'oldest':
+                sort_order = 'oldest'
+            
             params = {
                 'phrase': query,
                 'page': page,
                 'page_size': min(per_page, 75),
                 'product_types': 'easyaccess,editorialsubscription',
-                'fields': 'id,title,thumb,preview'
+                'fields': 'id,title,thumb,preview,date_created',
+                'sort_order': sort_order
             }
             
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/search/images",
-                    headers=headers,
-                    params=params,
-                    timeout=10.0
-                )
-                response.raise_for_status()
-                data = response.json()
+            client = http_client.client
+            response = await client.get(
+                f"{self.base_url}/search/images",
+                headers=headers,
+                params=params,
+                timeout=call_timeout(10.0)
+            )
+            response.raise_for_status()
+            data = response.json()
             
             images = []
             for item in data.get('images', []):
@@ -50,11 +60,13 @@ class iStockService:
                     source_url=f"https://www.istockphoto.com/photo/{item['id']}",
                     download_url='',
                     license='paid',
-                    image_id=str(item['id'])
+                    image_id=str(item['id']),
+                    published_at=normalize_timestamp(item.get('date_created'))
                 ))
             return images
         except Exception as e:
             print(f"Erro ao buscar iStock: {e}")
+            report_error(e)
             return []
 
 istock_service = iStockService()
\ No newline at end of file
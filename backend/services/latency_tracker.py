@@ -0,0 +1,93 @@
+from collections import deque
+from typing import Dict, Optional
+from config import get_settings
+
+
+class LatencyWindow:
+    """Janela deslizante das últimas latências (segundos) de uma fonte"""
+    def __init__(self, size: int):
+        self._samples = deque(maxlen=size)
+        self._sorted: Optional[list] = None
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(self, seconds: float):
+        self._samples.append(seconds)
+        self._sorted = None
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        # Ordenação preguiçosa: só refaz quando chegaram amostras novas
+        if self._sorted is None:
+            self._sorted = sorted(self._samples)
+        index = min(len(self._sorted) - 1, int(q / 100 * len(self._sorted)))
+        return self._sorted[index]
+
+
+class LatencyTracker:
+    """Latência observada por fonte e timeout adaptativo (p99 x fator, limitado a [min, max])"""
+    def __init__(self):
+        self.settings = get_settings()
+        self._windows: Dict[str, LatencyWindow] = {}
+
+    def _window(self, source: str) -> LatencyWindow:
+        window = self._windows.get(source)
+        if window is None:
+            window = self._windows[source] = LatencyWindow(self.settings.latency_window_size)
+        return window
+
+    def record(self, source: str, seconds: float):
+        self._window(source).add(seconds)
+
+    def record_censored(self, source: str, seconds: float):
+        """Chamada interrompida sem resposta (cancelada): a latência real é >= seconds.
+
+        Só entra na janela se não puxar os percentis para baixo: acima da mediana ou, enquanto não há
+        amostras suficientes, acima do limiar de lentidão (um deadline_ms curto não ensina nada).
+        """
+        p50 = self.percentile(source, 50)
+        if seconds >= (p50 if p50 is not None else self.slow_threshold(source)):
+            self.record(source, seconds)
+
+    def percentile(self, source: str, q: float) -> Optional[float]:
+        window = self._windows.get(source)
+        if window is None or len(window) < self.settings.latency_min_samples:
+            return None
+        return window.percentile(q)
+
+    def timeout_for(self, source: str, default: float) -> float:
+        if not self.settings.adaptive_timeout_enabled:
+            return default
+        p99 = self.percentile(source, 99)
+        if p99 is None:
+            return default
+        timeout = p99 * self.settings.adaptive_timeout_factor
+        return min(max(timeout, self.settings.adaptive_timeout_min), self.settings.adaptive_timeout_max)
+
+    def slow_threshold(self, source: str) -> float:
+        """Tempo a partir do qual uma chamada interrompida sem resposta indica uma fonte lenta/travada
+        (e não só um prazo curto escolhido pelo cliente)"""
+        slow = self.settings.slow_call_threshold_s
+        return min(self.timeout_for(source, slow), slow)
+
+    def snapshot(self) -> dict:
+        snapshot = {}
+        for source, window in self._windows.items():
+            snapshot[source] = {
+                'samples': len(window),
+                'p50_ms': _ms(window.percentile(50)),
+                'p95_ms': _ms(window.percentile(95)),
+                'p99_ms': _ms(window.percentile(99)),
+                # None enquanto não houver amostras suficientes (vale o timeout fixo do serviço)
+                'adaptive_timeout_s': self.timeout_for(source, None) if self.percentile(source, 99) is not None else None
+            }
+        return snapshot
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+latency_tracker = LatencyTracker()
@@ -0,0 +1,143 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+from pymongo import UpdateOne
+from config import get_settings
+from schemas import ImageSource
+from services.compact_records import CompactImage
+from services.database import database
+from services.ranking import bm25_scores, tokenize
+
+# Palavras que não identificam a imagem: fora do índice e da consulta
+STOPWORDS = frozenset("""
+a o as os um uma uns umas de da do das dos em na no nas nos por para com sem e ou que se ao aos à às
+foto fotos imagem imagens image images photo photos picture of the an and or in on at to for with by from
+""".split())
+
+
+def index_terms(text: str) -> List[str]:
+    return list(dict.fromkeys(token for token in tokenize(text) if len(token) > 1 and token not in STOPWORDS))
+
+
+def _document_text(image) -> str:
+    # Na Pixabay as tags vêm no description
+    return f"{image.title} {image.description or ''} {image.photographer or ''}"
+
+
+class LocalIndex:
+    """Índice invertido persistente (MongoDB) de todas as imagens já buscadas nas fontes.
+
+    Cada imagem é um documento com seus termos (título, descrição/tags, fotógrafo) num campo
+    multikey indexado; a consulta pede todos os termos da busca e ordena por BM25.
+    """
+    def __init__(self):
+        self.settings = get_settings()
+        self._pending_writes = set()
+        self._counters = {'indexed': 0, 'queries': 0, 'answered': 0, 'fallbacks': 0, 'errors': 0}
+
+    @property
+    def _collection(self):
+        return database.db[self.settings.index_collection]
+
+    def _available(self) -> bool:
+        return self.settings.index_enabled and database.available()
+
+    def _failed(self, e: Exception):
+        self._counters['errors'] += 1
+        database.mark_failed(e, "índice local")
+
+    async def ensure_indexes(self):
+        if not self._available():
+            return
+        try:
+            await self._collection.create_index('terms')
+            await self._collection.create_index('source')
+            await self._collection.create_index([('image.source', 1), ('image.image_id', 1)])
+            await self._collection.create_index(
+                'updated_at', expireAfterSeconds=int(self.settings.index_ttl_days * 86400)
+            )
+        except Exception as e:
+            self._failed(e)
+
+    def add(self, source: str, images: List[ImageSource]):
+        """Agenda a indexação em segundo plano (não atrasa a resposta da busca)"""
+        if not images or not self._available():
+            return
+        task = asyncio.create_task(self._write(source, images))
+        self._pending_writes.add(task)
+        task.add_done_callback(self._pending_writes.discard)
+
+    async def _write(self, source: str, images: List[ImageSource]):
+        now = datetime.now(timezone.utc)
+        operations = []
+        for image in images:
+            terms = index_terms(_document_text(image))
+            if not terms:
+                continue
+            operations.append(UpdateOne(
+                {'_id': f"{source}:{image.image_id}"},
+                {'$set': {
+                    'source': source,
+                    'image': CompactImage.pack(image).to_dict(),
+                    'terms': terms,
+                    'updated_at': now
+                }},
+                upsert=True
+            ))
+        if not operations:
+            return
+        try:
+            await self._collection.bulk_write(operations, ordered=False)
+            self._counters['indexed'] += len(operations)
+        except Exception as e:
+            self._failed(e)
+
+    async def flush(self):
+        """Aguarda as escritas pendentes (CLI de ingestão, desligamento)"""
+        if self._pending_writes:
+            await asyncio.gather(*self._pending_writes, return_exceptions=True)
+
+    async def search(self, query: str, sources: List[str], offset: int, limit: int) -> Optional[Tuple[List[ImageSource], int]]:
+        """Página [offset, offset + limit) das imagens indexadas que contêm todos os termos da query.
+
+        Retorna (imagens, total de candidatos) ou None se o índice não estiver disponível.
+        """
+        terms = index_terms(query)
+        if not terms or not self._available():
+            return None
+        self._counters['queries'] += 1
+        try:
+            cursor = self._collection.find(
+                {'terms': {'$all': terms}, 'source': {'$in': sources}},
+                {'image': 1}
+            ).limit(self.settings.index_candidate_limit)
+            docs = await cursor.to_list(length=self.settings.index_candidate_limit)
+        except Exception as e:
+            self._failed(e)
+            return None
+
+        records = [CompactImage.from_dict(doc['image']) for doc in docs]
+        scores = bm25_scores(query, [_document_text(record) for record in records])
+        # Só a página pedida volta a ser ImageSource
+        page = (-scores).argsort(kind='stable')[offset:offset + limit]
+        return [records[index].to_image() for index in page], len(records)
+
+    async def lookup(self, source: str, image_id: str) -> Optional[ImageSource]:
+        """Imagem indexada pelo `source` do próprio item (ex.: cc_flickr) e seu image_id"""
+        if not self._available():
+            return None
+        try:
+            doc = await self._collection.find_one({'image.source': source, 'image.image_id': image_id}, {'image': 1})
+        except Exception as e:
+            self._failed(e)
+            return None
+        return CompactImage.from_dict(doc['image']).to_image() if doc is not None else None
+
+    def record_outcome(self, answered: bool):
+        self._counters['answered' if answered else 'fallbacks'] += 1
+
+    def stats(self) -> dict:
+        return {**self._counters, 'pending_writes': len(self._pending_writes)}
+
+
+local_index = LocalIndex()
@@ -0,0 +1,205 @@
+import asyncio
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import httpx
+from services.cache_service import result_cache
+from services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, circuit_breakers
+from services.http_client import http_client
+from services.provider_call import current_call
+from services.singleflight import provider_flight, request_flight
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 15.0)
+RESULT_BUCKETS = (0, 1, 5, 10, 20, 50, 100, 200, 500)
+FANOUT_BUCKETS = (1, 2, 3, 4, 6, 8, 12, 18)
+
+Labels = Tuple[str, ...]
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _format(name: str, labels: Dict[str, str], value: float) -> str:
+    if labels:
+        name += '{' + ','.join(f'{key}="{_escape(str(label))}"' for key, label in labels.items()) + '}'
+    if value == float('inf'):
+        return f"{name} +Inf"
+    return f"{name} {value!r}"
+
+
+class Counter:
+    """Contador por combinação de labels. Sem lock: só é atualizado no event loop"""
+    kind = 'counter'
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> Iterable[Sample]:
+        for labels, value in self._values.items():
+            yield self.name, dict(zip(self.labels, labels)), value
+
+
+class Histogram:
+    """Histograma com buckets fixos; guarda contagens por bucket e acumula só na exportação"""
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float], labels: Sequence[str] = ()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.buckets = tuple(buckets)
+        # Por série: [contagem de cada bucket..., contagem acima do último, soma]
+        self._series: Dict[Labels, List[float]] = {}
+
+    def observe(self, value: float, *labels: str):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def samples(self) -> Iterable[Sample]:
+        for labels, series in self._series.items():
+            base = dict(zip(self.labels, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series):
+                cumulative += count
+                yield f"{self.name}_bucket", {**base, 'le': '+Inf' if bound == float('inf') else f"{bound:g}"}, cumulative
+            yield f"{self.name}_sum", base, series[-1]
+            yield f"{self.name}_count", base, cumulative
+
+
+class Collector:
+    """Métricas lidas na hora da coleta (estado que os módulos já mantêm: pool, cache, breakers)"""
+    def __init__(self, name: str, help: str, kind: str, collect: Callable[[], Iterable[Tuple[Dict[str, str], float]]]):
+        self.name, self.help, self.kind = name, help, kind
+        self._collect = collect
+
+    def samples(self) -> Iterable[Sample]:
+        for labels, value in self._collect():
+            yield self.name, labels, value
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Formato de exposição texto do Prometheus (0.0.4)"""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(_format(name, labels, value) for name, labels, value in metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+provider_latency = registry.register(Histogram(
+    'lumina_provider_request_duration_seconds', 'Duração das chamadas às fontes', LATENCY_BUCKETS, ('source',)
+))
+provider_outcomes = registry.register(Counter(
+    'lumina_provider_requests_total', 'Chamadas às fontes por resultado', ('source', 'outcome')
+))
+provider_results = registry.register(Histogram(
+    'lumina_provider_results', 'Imagens devolvidas por chamada bem-sucedida', RESULT_BUCKETS, ('source',)
+))
+provider_responses = registry.register(Counter(
+    'lumina_provider_http_responses_total', 'Respostas HTTP das APIs das fontes por status', ('source', 'code')
+))
+search_fanout = registry.register(Histogram(
+    'lumina_search_fanout_sources', 'Fontes chamadas em paralelo por rodada de fan-out de uma busca', FANOUT_BUCKETS
+))
+search_duration = registry.register(Histogram(
+    'lumina_search_duration_seconds', 'Duração das buscas (fan-out + merge)', LATENCY_BUCKETS, ('origin',)
+))
+
+
+def classify_error(error: Optional[BaseException]) -> str:
+    if error is None:
+        return 'ok'
+    if isinstance(error, (httpx.TimeoutException, asyncio.TimeoutError, TimeoutError)):
+        return 'timeout'
+    if isinstance(error, httpx.HTTPStatusError):
+        return 'http_status'
+    if isinstance(error, (ValueError, KeyError, TypeError, IndexError, AttributeError)):
+        # JSONDecodeError é ValueError; campos faltando no mapeamento do adapter caem aqui também
+        return 'parse_error'
+    if isinstance(error, httpx.RequestError):
+        return 'transport_error'
+    return 'error'
+
+
+def observe_provider_call(source: str, outcome: str, seconds: float, result_count: Optional[int] = None):
+    provider_latency.observe(seconds, source)
+    provider_outcomes.inc(source, outcome)
+    if result_count is not None:
+        provider_results.observe(result_count, source)
+
+
+async def observe_response(response: httpx.Response):
+    """Hook do cliente HTTP: status das respostas das fontes (downloads e miniaturas ficam de fora)"""
+    call = current_call.get()
+    if call is not None:
+        provider_responses.inc(call.source, str(response.status_code))
+
+
+http_client.add_response_hook(observe_response)
+
+
+def _pool():
+    stats = http_client.stats()
+    yield {'state': 'active'}, stats['active']
+    yield {'state': 'idle'}, stats['idle']
+
+
+def _pool_hosts():
+    for host, stats in http_client.stats()['hosts'].items():
+        yield {'host': host}, stats['connections']
+
+
+def _cache(*names: str):
+    def collect():
+        stats = result_cache.stats()
+        for name in names:
+            yield {'kind': name}, stats[name]
+    return collect
+
+
+_BREAKER_STATES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+def _breakers():
+    for source, breaker in circuit_breakers.items():
+        yield {'source': source}, _BREAKER_STATES[breaker.state]
+
+
+def _flights():
+    for level, flight in (('request', request_flight), ('provider', provider_flight)):
+        stats = flight.stats()
+        yield {'level': level, 'result': 'executed'}, stats['executed']
+        yield {'level': level, 'result': 'coalesced'}, stats['coalesced']
+
+
+registry.register(Collector('lumina_http_pool_connections', 'Conexões no pool HTTP compartilhado', 'gauge', _pool))
+registry.register(Collector('lumina_http_pool_max_connections', 'Limite de conexões do pool HTTP', 'gauge',
+                            lambda: [({}, http_client.settings.http_max_connections)]))
+registry.register(Collector('lumina_http_pool_host_connections', 'Conexões abertas por host', 'gauge', _pool_hosts))
+registry.register(Collector('lumina_cache_lookups_total', 'Consultas ao cache de resultados', 'counter',
+                            _cache('memory_hits', 'mongo_hits', 'misses')))
+registry.register(Collector('lumina_cache_events_total', 'Escritas, prefetch e erros do cache de resultados', 'counter',
+                            _cache('stores', 'mongo_errors', 'prefetch_stores', 'prefetch_hits', 'prefetch_wasted')))
+registry.register(Collector('lumina_cache_memory_entries', 'Entradas no LRU em memória do cache', 'gauge',
+                            lambda: [({}, result_cache.stats()['memory_entries'])]))
+registry.register(Collector('lumina_singleflight_calls_total', 'Chamadas executadas e coalescidas pelo single-flight',
+                            'counter', _flights))
+registry.register(Collector('lumina_circuit_state', 'Estado do circuit breaker (0 fechado, 1 meio-aberto, 2 aberto)',
+                            'gauge', _breakers))
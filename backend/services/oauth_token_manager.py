@@ -0,0 +1,181 @@
+import asyncio
+import time
+from typing import Callable, Dict, List, Optional
+import httpx
+from config import get_settings
+from services.database import database
+from services.http_client import http_client
+
+
+class OAuthTokenManager:
+    """Token OAuth2 client-credentials de uma fonte.
+
+    Busca o token uma vez, renova em segundo plano antes de expirar, compartilha entre
+    workers via MongoDB e, num 401, renova e repete a requisição uma única vez.
+    """
+    def __init__(self, name: str, token_url: str,
+                 build_request: Callable[[], Dict[str, dict]],
+                 is_configured: Callable[[], bool]):
+        self.settings = get_settings()
+        self.name = name
+        self.token_url = token_url
+        # Devolve {'headers': ..., 'data': ...} do POST ao endpoint de token
+        self._build_request = build_request
+        self._is_configured = is_configured
+        self._access_token: Optional[str] = None
+        self._expires_at = 0.0
+        self._retry_at = 0.0
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._counters = {'fetched': 0, 'shared_hits': 0, 'refresh_errors': 0, 'retries_401': 0}
+
+    def _is_fresh(self, expires_at: float) -> bool:
+        return expires_at - self.settings.oauth_refresh_margin_s > time.time()
+
+    @property
+    def _collection(self):
+        return database.db[self.settings.oauth_token_collection]
+
+    async def get_token(self) -> Optional[str]:
+        if self._access_token and self._is_fresh(self._expires_at):
+            return self._access_token
+        return await self.refresh(stale_token=self._access_token)
+
+    async def refresh(self, stale_token: Optional[str] = None) -> Optional[str]:
+        """Renova o token; chamadas concorrentes esperam a mesma renovação"""
+        async with self._lock:
+            # Outra corrotina já renovou enquanto esperávamos o lock
+            if self._access_token and self._access_token != stale_token and self._is_fresh(self._expires_at):
+                return self._access_token
+            # Após uma falha, não insiste no endpoint de token a cada busca
+            if time.monotonic() < self._retry_at:
+                return None
+
+            shared = await self._load_shared(stale_token)
+            if shared is not None:
+                self._counters['shared_hits'] += 1
+                self._access_token, self._expires_at = shared
+                return self._access_token
+
+            try:
+                token, expires_at = await self._fetch()
+            except Exception as e:
+                self._counters['refresh_errors'] += 1
+                self._retry_at = time.monotonic() + self.settings.oauth_retry_s
+                print(f"Erro ao obter token {self.name}: {e}")
+                return None
+            self._counters['fetched'] += 1
+            self._access_token, self._expires_at = token, expires_at
+            await self._store_shared(token, expires_at)
+            return token
+
+    async def _fetch(self):
+        request = self._build_request()
+        response = await http_client.client.post(
+            self.token_url,
+            headers=request.get('headers'),
+            data=request.get('data'),
+            timeout=10.0
+        )
+        response.raise_for_status()
+        token_data = response.json()
+        # Sem expires_in (alguns tokens não expiram) renovamos mesmo assim de tempos em tempos
+        expires_in = float(token_data.get('expires_in') or self.settings.oauth_default_ttl_s)
+        return token_data['access_token'], time.time() + expires_in
+
+    async def _load_shared(self, stale_token: Optional[str]):
+        if not database.available():
+            return None
+        try:
+            doc = await self._collection.find_one({'_id': self.name})
+        except Exception as e:
+            database.mark_failed(e, f"token {self.name}")
+            return None
+        if doc is None or doc['access_token'] == stale_token or not self._is_fresh(doc['expires_at']):
+            return None
+        return doc['access_token'], doc['expires_at']
+
+    async def _store_shared(self, token: str, expires_at: float):
+        if not database.available():
+            return
+        try:
+            await self._collection.replace_one(
+                {'_id': self.name},
+                {'access_token': token, 'expires_at': expires_at},
+                upsert=True
+            )
+        except Exception as e:
+            database.mark_failed(e, f"token {self.name}")
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Requisição autenticada com Bearer; num 401 renova o token e tenta de novo uma vez"""
+        token = await self.get_token()
+        if token is None:
+            raise RuntimeError(f"token {self.name} indisponível")
+        headers = dict(kwargs.pop('headers', None) or {})
+        headers['Authorization'] = f'Bearer {token}'
+        response = await http_client.client.request(method, url, headers=headers, **kwargs)
+        if response.status_code != 401:
+            return response
+
+        self._counters['retries_401'] += 1
+        token = await self.refresh(stale_token=token)
+        if token is None:
+            return response
+        headers['Authorization'] = f'Bearer {token}'
+        return await http_client.client.request(method, url, headers=headers, **kwargs)
+
+    async def _refresh_loop(self):
+        while True:
+            if self._access_token:
+                delay = self._expires_at - self.settings.oauth_refresh_margin_s - time.time()
+            else:
+                delay = 0
+            await asyncio.sleep(max(delay, 1.0))
+            await self.refresh(stale_token=self._access_token)
+            if self._retry_at > time.monotonic():
+                await asyncio.sleep(self._retry_at - time.monotonic())
+
+    def start(self):
+        if self._is_configured() and self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    def stats(self) -> dict:
+        return {
+            **self._counters,
+            'has_token': self._access_token is not None,
+            'expires_in_s': round(self._expires_at - time.time()) if self._access_token else None
+        }
+
+
+class OAuthTokenRegistry:
+    """Gerenciadores de token de todas as fontes OAuth (iniciados/parados no lifespan)"""
+    def __init__(self):
+        self._managers: List[OAuthTokenManager] = []
+
+    def register(self, manager: OAuthTokenManager) -> OAuthTokenManager:
+        self._managers.append(manager)
+        return manager
+
+    def start(self):
+        for manager in self._managers:
+            manager.start()
+
+    async def stop(self):
+        for manager in self._managers:
+            await manager.stop()
+
+    def stats(self) -> dict:
+        return {manager.name: manager.stats() for manager in self._managers}
+
+
+oauth_tokens = OAuthTokenRegistry()
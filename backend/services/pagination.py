@@ -0,0 +1,161 @@
+import asyncio
+import base64
+import hashlib
+import json
+from typing import Dict, List, Optional, Set, Tuple
+from config import get_settings
+from schemas import ImageSource
+from services.providers import PROVIDERS, search_provider
+from services.cache_service import result_cache
+from services.allocation import allocate, allocation_stats
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def _fingerprint(query: str, order_by: str) -> str:
+    key = f"{result_cache.normalize_query(query)}|{order_by}"
+    return hashlib.sha1(key.encode()).hexdigest()[:10]
+
+
+class SearchCursor:
+    """Cursor opaco com o deslocamento (em itens) já entregue de cada fonte"""
+    def __init__(self, offsets: Optional[Dict[str, int]] = None, exhausted: Optional[Set[str]] = None):
+        self.offsets: Dict[str, int] = dict(offsets or {})
+        self.exhausted: Set[str] = set(exhausted or ())
+
+    def offset(self, source: str) -> int:
+        return self.offsets.get(source, 0)
+
+    def encode(self, query: str, order_by: str) -> str:
+        payload = {
+            'h': _fingerprint(query, order_by),
+            'o': {source: offset for source, offset in self.offsets.items() if offset},
+            'x': sorted(self.exhausted)
+        }
+        raw = json.dumps(payload, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    @classmethod
+    def decode(cls, cursor: str, query: str, order_by: str) -> "SearchCursor":
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            payload = json.loads(raw)
+            offsets = {str(source): int(offset) for source, offset in payload.get('o', {}).items()}
+            exhausted = {str(source) for source in payload.get('x', [])}
+            fingerprint = payload.get('h')
+        except (ValueError, TypeError, AttributeError) as e:
+            raise InvalidCursorError(f"cursor malformado: {e}")
+        # O cursor só vale para a mesma busca (query + ordenação)
+        if fingerprint != _fingerprint(query, order_by):
+            raise InvalidCursorError("cursor pertence a outra busca")
+        if any(offset < 0 for offset in offsets.values()):
+            raise InvalidCursorError("deslocamento negativo")
+        return cls(offsets, exhausted)
+
+
+def upstream_page_size(source: str) -> int:
+    # Tamanho fixo por fonte: páginas estáveis entre requisições rendem acertos no cache
+    return min(PROVIDERS[source].max_page_size, get_settings().cursor_upstream_page_size)
+
+
+class PagePlan:
+    """Plano de uma página via cursor: quanto pedir a cada fonte e a partir de qual deslocamento.
+
+    O per_page é dividido pelos pesos de allocation_stats; se alguma fonte vier curta,
+    top_up() redistribui a diferença entre as fontes que ainda têm itens.
+    """
+    def __init__(self, cursor: SearchCursor, sources: List[str], per_page: int):
+        self.cursor = cursor
+        self.sources = sources
+        self.per_page = per_page
+        self.limits = allocate(per_page, {source: allocation_stats.weight(source) for source in sources})
+        # Itens entregues por fonte nesta requisição (somando as rodadas)
+        self.delivered: Dict[str, int] = {}
+        self.exhausted: Set[str] = set(cursor.exhausted)
+        self._filled: Set[str] = set()
+
+    async def fetch(self, source: str, query: str, order_by: str) -> List[ImageSource]:
+        """Busca a janela [offset, offset + limit) da fonte, pedindo as páginas upstream necessárias em paralelo"""
+        limit = self.limits.get(source, 0)
+        if limit <= 0:
+            return []
+        offset = self.cursor.offset(source) + self.delivered.get(source, 0)
+        page_size = upstream_page_size(source)
+        first_page = offset // page_size
+        last_page = (offset + limit - 1) // page_size
+
+        pages = await asyncio.gather(
+            *[search_provider(source, query, number + 1, page_size, order_by) for number in range(first_page, last_page + 1)],
+            return_exceptions=True
+        )
+
+        items: List[ImageSource] = []
+        reached_end = False
+        for index, result in enumerate(pages):
+            if isinstance(result, BaseException):
+                # Sem a primeira página não há o que entregar; depois dela, entrega o prefixo contíguo
+                if index == 0:
+                    raise result
+                break
+            items.extend(result)
+            if len(result) < page_size:
+                reached_end = True
+                break
+
+        start = offset - first_page * page_size
+        window = items[start:start + limit]
+        if reached_end and start + limit >= len(items):
+            self.exhausted.add(source)
+        elif len(window) == limit:
+            self._filled.add(source)
+
+        allocation_stats.record(source, limit, len(window))
+        self.delivered[source] = self.delivered.get(source, 0) + len(window)
+        return window
+
+    def shortfall(self) -> int:
+        return self.per_page - sum(self.delivered.values())
+
+    def top_up(self) -> List[str]:
+        """Prepara uma nova rodada com a diferença para o per_page; retorna as fontes a chamar"""
+        shortfall = self.shortfall()
+        candidates = [source for source in self.sources if source in self._filled and source not in self.exhausted]
+        self._filled = set()
+        if shortfall <= 0 or not candidates:
+            return []
+        self.limits = allocate(shortfall, {source: allocation_stats.weight(source) for source in candidates})
+        return [source for source in candidates if self.limits[source] > 0]
+
+    def prefetch_pages(self) -> List[Tuple[str, int, int]]:
+        """Páginas upstream (fonte, página, tamanho) que a próxima página do cursor deve pedir,
+        estimadas com os pesos atuais de allocation_stats
+        """
+        sources = [source for source in self.sources if source not in self.exhausted]
+        if not sources:
+            return []
+        limits = allocate(self.per_page, {source: allocation_stats.weight(source) for source in sources})
+        pages = []
+        for source in sources:
+            if limits.get(source, 0) <= 0:
+                continue
+            offset = self.cursor.offset(source) + self.delivered.get(source, 0)
+            page_size = upstream_page_size(source)
+            for number in range(offset // page_size, (offset + limits[source] - 1) // page_size + 1):
+                pages.append((source, number + 1, page_size))
+        return pages
+
+    def next_cursor(self, query: str, order_by: str) -> Optional[str]:
+        """Avança cada fonte exatamente pelo que foi entregue (falhas e timeouts não avançam)"""
+        offsets = dict(self.cursor.offsets)
+        for source, count in self.delivered.items():
+            offsets[source] = offsets.get(source, 0) + count
+        if all(source in self.exhausted for source in self.sources):
+            return None
+        return SearchCursor(offsets, self.exhausted).encode(query, order_by)
+
+
+def plan_page(cursor: SearchCursor, active_sources: List[str], per_page: int) -> PagePlan:
+    sources = [source for source in active_sources if source not in cursor.exhausted]
+    return PagePlan(cursor, sources, per_page)
@@ -0,0 +1,212 @@
+import asyncio
+import io
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from config import get_settings
+from schemas import ImageSource
+from services.dedup import source_ref
+from services.http_client import http_client
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+HASH_SIZE = 8
+
+
+class ImageTooLargeError(ValueError):
+    """Imagem maior que phash_max_source_bytes: fica sem hash (não entra na comparação)"""
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    k = np.arange(n)
+    matrix = np.cos(np.pi * (2 * k[None, :] + 1) * k[:, None] / (2 * n)) * np.sqrt(2 / n)
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+
+_DCT_32 = _dct_matrix(32)
+
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), 'big')
+
+
+def dhash(pixels: np.ndarray) -> int:
+    """Gradiente horizontal de uma imagem 9x8 em tons de cinza: 64 bits"""
+    return _bits_to_int(pixels[:, 1:] > pixels[:, :-1])
+
+
+def phash(pixels: np.ndarray) -> int:
+    """DCT 2D de uma imagem 32x32; os 8x8 coeficientes de baixa frequência comparados à mediana"""
+    low = (_DCT_32 @ pixels @ _DCT_32.T)[:HASH_SIZE, :HASH_SIZE]
+    # O coeficiente DC (brilho médio) fica fora da mediana
+    return _bits_to_int(low > np.median(low.ravel()[1:]))
+
+
+def compute_hash(data: bytes, algorithm: str) -> Optional[int]:
+    """Executa no pool de processos: decodifica a miniatura e calcula o hash (None se não for imagem)"""
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            gray = image.convert('L')
+            size = (HASH_SIZE + 1, HASH_SIZE) if algorithm == 'dhash' else (32, 32)
+            pixels = np.asarray(gray.resize(size, Image.LANCZOS), dtype=np.float64)
+    except Exception:
+        return None
+    return dhash(pixels) if algorithm == 'dhash' else phash(pixels)
+
+
+def hamming_matrix(hashes: List[int]) -> np.ndarray:
+    """Distância de Hamming entre todos os pares de hashes de 64 bits"""
+    values = np.array(hashes, dtype=np.uint64)
+    xor = values[:, None] ^ values[None, :]
+    return np.unpackbits(xor.view(np.uint8), axis=-1).reshape(len(hashes), len(hashes), -1).sum(axis=-1)
+
+
+class PerceptualHasher:
+    """Hash perceptual das miniaturas (dHash/pHash) para achar a mesma foto recodificada ou redimensionada.
+
+    Download pelo cliente HTTP compartilhado, decodificação e hash num ProcessPoolExecutor (fora do
+    event loop) e cache dos hashes por URL.
+    """
+    def __init__(self):
+        self.settings = get_settings()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._cache: "OrderedDict[str, Optional[int]]" = OrderedDict()
+        self._downloads: Optional[asyncio.Semaphore] = None
+        self._background = set()
+        self._counters = {'cache_hits': 0, 'computed': 0, 'failed': 0, 'too_large': 0, 'collapsed': 0}
+
+    @property
+    def available(self) -> bool:
+        return PIL_AVAILABLE
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: o processo da API tem threads (motor, executor padrão) que não combinam com fork
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.settings.phash_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._pool
+
+    async def start(self):
+        """Sobe os processos do pool antes da primeira busca (o spawn leva centenas de ms)"""
+        if not self.available:
+            return
+        loop = asyncio.get_running_loop()
+        executor = self._executor()
+        await asyncio.gather(*(loop.run_in_executor(executor, compute_hash, b'', self.settings.phash_algorithm)
+                               for _ in range(self.settings.phash_workers)))
+
+    def _remember(self, url: str, value: Optional[int]):
+        self._cache[url] = value
+        self._cache.move_to_end(url)
+        while len(self._cache) > self.settings.phash_cache_max_entries:
+            self._cache.popitem(last=False)
+
+    async def _download(self, url: str) -> bytes:
+        """Corpo da imagem lido em streaming, interrompido em phash_max_source_bytes"""
+        if self._downloads is None:
+            self._downloads = asyncio.Semaphore(self.settings.phash_max_downloads)
+        async with self._downloads:
+            async with http_client.client.stream(
+                'GET', url, timeout=self.settings.phash_download_timeout_s, follow_redirects=True
+            ) as response:
+                response.raise_for_status()
+                chunks, size = [], 0
+                async for chunk in response.aiter_bytes():
+                    size += len(chunk)
+                    if size > self.settings.phash_max_source_bytes:
+                        raise ImageTooLargeError(f"imagem maior que {self.settings.phash_max_source_bytes} bytes")
+                    chunks.append(chunk)
+        return b''.join(chunks)
+
+    async def hash_url(self, url: str) -> Optional[int]:
+        if url in self._cache:
+            self._counters['cache_hits'] += 1
+            self._cache.move_to_end(url)
+            return self._cache[url]
+
+        try:
+            data = await self._download(url)
+            loop = asyncio.get_running_loop()
+            value = await loop.run_in_executor(
+                self._executor(), compute_hash, data, self.settings.phash_algorithm
+            )
+        except ImageTooLargeError:
+            self._counters['too_large'] += 1
+            value = None
+        except Exception:
+            value = None
+        self._counters['computed' if value is not None else 'failed'] += 1
+        self._remember(url, value)
+        return value
+
+    async def _hash_all(self, urls: List[str]) -> Dict[str, Optional[int]]:
+        """Hashes das URLs que ficarem prontas dentro do prazo; as demais ficam de fora desta resposta,
+        mas continuam em segundo plano e entram no cache para as próximas
+        """
+        tasks = {url: asyncio.ensure_future(self.hash_url(url)) for url in set(urls)}
+        if not tasks:
+            return {}
+        done, pending = await asyncio.wait(tasks.values(), timeout=self.settings.phash_timeout_ms / 1000)
+        for task in pending:
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+        return {url: task.result() for url, task in tasks.items() if task in done}
+
+    async def collapse(self, results: Dict[str, List[ImageSource]],
+                       source_list: List[str]) -> Tuple[Dict[str, List[ImageSource]], int]:
+        """Junta quase-duplicatas (distância de Hamming <= phash_max_distance), mantendo a primeira
+        na ordem de source_list e acumulando as fontes em `sources`.
+        """
+        entries = [(source, image) for source in source_list for image in results.get(source, [])]
+        hashes = await self._hash_all([image.thumbnail_url for _, image in entries if image.thumbnail_url])
+        hashed = [index for index, (_, image) in enumerate(entries) if hashes.get(image.thumbnail_url) is not None]
+        if len(hashed) < 2:
+            return results, 0
+
+        distances = hamming_matrix([hashes[entries[index][1].thumbnail_url] for index in hashed])
+        close = distances <= self.settings.phash_max_distance
+        replaced: Dict[int, ImageSource] = {}
+        removed = set()
+        for row, keeper in enumerate(hashed):
+            if keeper in removed:
+                continue
+            duplicates = [hashed[column] for column in np.nonzero(close[row, row + 1:])[0] + row + 1
+                          if hashed[column] not in removed]
+            if not duplicates:
+                continue
+            source, image = entries[keeper]
+            refs = list(image.sources or [source_ref(source, image)])
+            for index in duplicates:
+                duplicate_source, duplicate = entries[index]
+                refs.extend(duplicate.sources or [source_ref(duplicate_source, duplicate)])
+                removed.add(index)
+            replaced[keeper] = image.model_copy(update={'sources': refs})
+
+        self._counters['collapsed'] += len(removed)
+        collapsed: Dict[str, List[ImageSource]] = {source: [] for source in source_list}
+        for index, (source, image) in enumerate(entries):
+            if index not in removed:
+                collapsed[source].append(replaced.get(index, image))
+        return collapsed, len(removed)
+
+    def close(self):
+        for task in self._background:
+            task.cancel()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def stats(self) -> dict:
+        return {**self._counters, 'cached_hashes': len(self._cache)}
+
+
+perceptual_hasher = PerceptualHasher()
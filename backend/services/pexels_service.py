@@ -1,7 +1,8 @@
-import httpx
 from typing import List
 from config import get_settings
 from schemas import ImageSource
+from services.http_client import http_client
+from services.provider_call import call_timeout, report_error
 
 class PexelsService:
     def __init__(self):
@@ -20,15 +21,15 @@ class PexelsService:
                 'per_page': min(per_page, 80)
             }
             
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/search",
-                    params=params,
-                    headers=headers,
-                    timeout=10.0
-                )
-                response.raise_for_status()
-                data = response.json()
+            client = http_client.client
+            response = await client.get(
+                f"{self.base_url}/search",
+                params=params,
+                headers=headers,
+                timeout=call_timeout(10.0)
+            )
+            response.raise_for_status()
+            data = response.json()
             
             images = []
             for photo in data.get('photos', []):
@@ -49,6 +50,7 @@ class PexelsService:
             return images
         except Exception as e:
             print(f"Error searching Pexels: {e}")
+            report_error(e)
             return []
 
 pexels_service = PexelsService()
\ No newline at end of file
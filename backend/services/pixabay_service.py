@@ -1,7 +1,8 @@
-import httpx
 from typing import List
 from config import get_settings
 from schemas import ImageSource
+from services.http_client import http_client
+from services.provider_call import call_timeout, report_error
 
 class PixabayService:
     def __init__(self):
@@ -27,10 +28,10 @@ class PixabayService:
                 'order': pixabay_order
             }
             
-            async with httpx.AsyncClient(follow_redirects=True) as client:
-                response = await client.get(self.base_url, params=params, timeout=10.0)
-                response.raise_for_status()
-                data = response.json()
+            client = http_client.client
+            response = await client.get(self.base_url, params=params, timeout=call_timeout(10.0), follow_redirects=True)
+            response.raise_for_status()
+            data = response.json()
             
             images = []
             for hit in data.get('hits', []):
@@ -51,6 +52,7 @@ class PixabayService:
             return images
         except Exception as e:
             print(f"Error searching Pixabay: {e}")
+            report_error(e)
             return []
 
 pixabay_service = PixabayService()
\ No newline at end of file
@@ -0,0 +1,119 @@
+import asyncio
+from typing import Dict, Hashable, List, Optional, Tuple
+from config import get_settings
+from services.cache_service import result_cache
+from services.circuit_breaker import CircuitOpenError
+from services.providers import prefetch_provider
+from services.rate_limiter import RateLimitedError, rate_limiter
+
+# (fonte, página, per_page) de uma chamada a trazer para o cache
+PageRequest = Tuple[str, int, int]
+
+
+class Prefetcher:
+    """Prefetch da próxima página das fontes depois que a resposta de /api/search já saiu.
+
+    As páginas entram no cache de resultados pelo mesmo caminho das buscas (single-flight, circuit
+    breaker, rate limit), mas sem esperar por cota, sem hedging e deixando uma reserva da cota
+    para as buscas reais. Um novo agendamento da mesma busca cancela o anterior.
+    """
+    def __init__(self):
+        self.settings = get_settings()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._groups: Dict[Hashable, List[asyncio.Task]] = {}
+        self._tasks = set()
+        self._counters = {
+            'scheduled': 0,
+            'fetched': 0,
+            'skipped_cached': 0,
+            'skipped_quota': 0,
+            'skipped_circuit': 0,
+            'dropped': 0,
+            'cancelled': 0,
+            'failed': 0
+        }
+
+    def _quota_low(self, source: str) -> bool:
+        quota = rate_limiter.snapshot(source)
+        reserve = self.settings.prefetch_quota_reserve
+        for limit, remaining in ((quota['limit'], quota['remaining']),
+                                 (quota['upstream_limit'], quota['upstream_remaining'])):
+            if limit and remaining is not None and remaining < limit * reserve:
+                return True
+        return False
+
+    async def schedule(self, query: str, order_by: str, pages: List[PageRequest]):
+        """Agenda as páginas; chamado como BackgroundTask, depois do envio da resposta"""
+        if not self.settings.prefetch_enabled or not self.settings.cache_enabled or not pages:
+            return
+        group = (result_cache.normalize_query(query), order_by)
+        self.cancel(group)
+
+        tasks = []
+        for source, page, per_page in pages:
+            if len(self._tasks) >= self.settings.prefetch_max_pending:
+                self._counters['dropped'] += 1
+                continue
+            task = asyncio.create_task(self._run(source, query, page, per_page, order_by))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            task.add_done_callback(lambda _, group=group: self._forget(group))
+            tasks.append(task)
+        self._counters['scheduled'] += len(tasks)
+        if tasks:
+            self._groups[group] = tasks
+
+    def _forget(self, group: Hashable):
+        tasks = self._groups.get(group)
+        if tasks is not None and all(task.done() for task in tasks):
+            del self._groups[group]
+
+    def cancel(self, group: Hashable):
+        for task in self._groups.pop(group, []):
+            task.cancel()
+
+    async def _run(self, source: str, query: str, page: int, per_page: int, order_by: str):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.settings.prefetch_concurrency)
+        try:
+            # Atraso: o usuário pode refinar a busca logo em seguida e cancelar este prefetch
+            await asyncio.sleep(self.settings.prefetch_delay_ms / 1000)
+            async with self._semaphore:
+                if self._quota_low(source):
+                    self._counters['skipped_quota'] += 1
+                    return
+                fetched = await asyncio.wait_for(
+                    prefetch_provider(source, query, page, per_page, order_by), self.settings.prefetch_timeout_s
+                )
+            self._counters['fetched' if fetched else 'skipped_cached'] += 1
+        except asyncio.CancelledError:
+            self._counters['cancelled'] += 1
+        except RateLimitedError:
+            self._counters['skipped_quota'] += 1
+        except CircuitOpenError:
+            self._counters['skipped_circuit'] += 1
+        except Exception:
+            # ProviderError, timeout ou erro inesperado: o prefetch é opcional e nunca propaga
+            self._counters['failed'] += 1
+
+    async def cancel_all(self):
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._groups.clear()
+
+    def stats(self) -> dict:
+        cache = result_cache.stats()
+        prefetched = cache['prefetch_stores']
+        return {
+            **self._counters,
+            'pending': len(self._tasks),
+            'hits': cache['prefetch_hits'],
+            'wasted': cache['prefetch_wasted'],
+            # Fração das páginas trazidas pelo prefetch que uma busca de fato leu do cache
+            'hit_rate': round(cache['prefetch_hits'] / prefetched, 3) if prefetched else None
+        }
+
+
+prefetcher = Prefetcher()
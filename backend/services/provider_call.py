@@ -0,0 +1,46 @@
+import httpx
+from contextvars import ContextVar
+from typing import Optional
+
+
+class ProviderCall:
+    """Estado de uma chamada a uma fonte, visível para o serviço via contextvar"""
+    __slots__ = ('source', 'error', 'timeout', 'timings')
+
+    def __init__(self, source: str, timeout: Optional[float] = None, timings=None):
+        self.source = source
+        self.error: Optional[Exception] = None
+        # Timeout adaptativo calculado para esta chamada (None = usar o padrão do serviço)
+        self.timeout = timeout
+        # CallTimings quando a requisição pediu o detalhamento de tempos (Server-Timing)
+        self.timings = timings
+
+
+class ProviderError(Exception):
+    """Falha de uma fonte (os serviços retornam [] e reportam o erro original)"""
+    def __init__(self, source: str, cause: Exception):
+        super().__init__(f"{source}: {cause!r}")
+        self.source = source
+        self.cause = cause
+
+    @property
+    def is_timeout(self) -> bool:
+        return isinstance(self.cause, (httpx.TimeoutException, TimeoutError))
+
+
+current_call: ContextVar[Optional[ProviderCall]] = ContextVar('current_call', default=None)
+
+
+def report_error(e: Exception):
+    """Chamado no except dos serviços para que o erro não se perca no retorno []"""
+    call = current_call.get()
+    if call is not None:
+        call.error = e
+
+
+def call_timeout(default: float) -> float:
+    """Timeout da chamada atual: o adaptativo, se houver, senão o padrão do serviço"""
+    call = current_call.get()
+    if call is None or call.timeout is None:
+        return default
+    return call.timeout
@@ -0,0 +1,194 @@
+import asyncio
+import time
+from typing import Dict, List, NamedTuple, Tuple
+from config import get_settings
+from schemas import ImageSource
+from services.google_search import google_service
+from services.unsplash_service import unsplash_service
+from services.pexels_service import pexels_service
+from services.pixabay_service import pixabay_service
+from services.shutterstock_service import shutterstock_service
+from services.getty_service import getty_service
+from services.istock_service import istock_service
+from services.pulsar_service import pulsar_service
+from services.fotoarena_service import fotoarena_service
+from services.usp_service import usp_service
+from services.tyba_service import tyba_service
+from services.natureza_brasileira_service import natureza_brasileira_service
+from services.colombini_service import colombini_service
+from services.freepik_service import freepik_service
+from services.creative_commons_service import creative_commons_service
+from services.agencia_brasil_service import agencia_brasil_service
+from services.inpe_service import inpe_service
+from services.ibge_service import ibge_service
+from services.cache_service import result_cache
+from services.local_index import local_index
+from services.singleflight import provider_flight
+from services.provider_call import ProviderCall, ProviderError, current_call
+from services.circuit_breaker import CLOSED, CircuitOpenError, circuit_breakers
+from services.latency_tracker import latency_tracker
+from services.hedging import hedging_policy
+from services.rate_limiter import RateLimitedError, rate_limiter
+from services.metrics import classify_error, observe_provider_call
+from services.timings import start_call
+
+
+class Provider(NamedTuple):
+    service: object
+    name: str
+    tier: str
+    supports_order_by: bool
+    # Maior page size aceito pela API da fonte (o serviço limita com min())
+    max_page_size: int
+    # Configurações que precisam estar preenchidas para a fonte funcionar
+    required_settings: Tuple[str, ...] = ()
+
+
+# A ordem do dicionário define a ordem de concatenação dos resultados
+PROVIDERS: Dict[str, Provider] = {
+    # Fontes gratuitas
+    'google': Provider(google_service, "Google Custom Search", "free", False, 10, ('google_api_key', 'google_search_engine_id')),
+    'unsplash': Provider(unsplash_service, "Unsplash", "free", True, 20, ('unsplash_api_key',)),
+    'pexels': Provider(pexels_service, "Pexels", "free", True, 80, ('pexels_api_key',)),
+    'pixabay': Provider(pixabay_service, "Pixabay", "free", True, 200, ('pixabay_api_key',)),
+    # Fontes pagas internacionais
+    'shutterstock': Provider(shutterstock_service, "Shutterstock", "paid", True, 100, ('shutterstock_client_id', 'shutterstock_client_secret')),
+    'getty_images': Provider(getty_service, "Getty Images", "paid", True, 100, ('getty_images_api_key',)),
+    'istock': Provider(istock_service, "iStock", "paid", True, 75, ('istock_api_key',)),
+    'pulsar_imagens': Provider(pulsar_service, "Pulsar Imagens", "paid", False, 50, ('pulsar_imagens_api_key',)),
+    # Fontes pagas brasileiras
+    'fotoarena': Provider(fotoarena_service, "Foto Arena", "paid", False, 50, ('fotoarena_api_key',)),
+    'usp_imagens': Provider(usp_service, "USP Imagens", "paid", False, 50, ('usp_imagens_api_key',)),
+    'tyba': Provider(tyba_service, "Tyba", "paid", False, 50, ('tyba_api_key',)),
+    'natureza_brasileira': Provider(natureza_brasileira_service, "Natureza Brasileira", "paid", False, 50, ('natureza_brasileira_api_key',)),
+    'fabio_colombini': Provider(colombini_service, "Fabio Colombini", "paid", False, 50, ('fabio_colombini_api_key',)),
+    # Freepik
+    'freepik': Provider(freepik_service, "Freepik", "paid", False, 200, ('freepik_api_key',)),
+    # Creative Commons
+    'creative_commons': Provider(creative_commons_service, "Creative Commons", "paid", True, 500),
+    # Fontes Públicas Brasileiras
+    'agencia_brasil': Provider(agencia_brasil_service, "Agência Brasil", "paid", True, 50, ('agencia_brasil_api_key',)),
+    'inpe': Provider(inpe_service, "INPE Satélite", "paid", True, 100, ('inpe_api_key',)),
+    'ibge': Provider(ibge_service, "IBGE Cidades", "paid", True, 50, ('ibge_api_key',)),
+}
+
+
+def is_configured(source: str) -> bool:
+    settings = get_settings()
+    return all(getattr(settings, name) for name in PROVIDERS[source].required_settings)
+
+
+def parse_sources(sources: str) -> List[str]:
+    """Converte 'a,b,c' na lista de fontes válidas, na ordem do registro"""
+    requested = {s.strip() for s in sources.split(",")}
+    return [source for source in PROVIDERS if source in requested]
+
+
+async def fetch_provider(source: str, query: str, page: int, per_page: int, order_by: str) -> List[ImageSource]:
+    """Chama diretamente o serviço da fonte, sem cache; levanta ProviderError se o serviço reportou falha"""
+    provider = PROVIDERS[source]
+    call = ProviderCall(source, timeout=latency_tracker.timeout_for(source, None), timings=start_call(source))
+    token = current_call.set(call)
+    start = time.perf_counter()
+    try:
+        if provider.supports_order_by:
+            images = await provider.service.search_images(query, page, per_page, order_by)
+        else:
+            images = await provider.service.search_images(query, page, per_page)
+    except asyncio.CancelledError:
+        # Prazo da busca, hedge vencedor ou cliente que desistiu. Fontes que sempre passam do prazo
+        # só chegam a ter timeout adaptativo se essas chamadas entrarem como amostras censuradas
+        elapsed = time.perf_counter() - start
+        observe_provider_call(source, 'cancelled', elapsed)
+        latency_tracker.record_censored(source, elapsed)
+        raise
+    finally:
+        current_call.reset(token)
+        if call.timings is not None:
+            call.timings.finish(time.perf_counter() - start)
+    elapsed = time.perf_counter() - start
+    observe_provider_call(source, classify_error(call.error), elapsed,
+                          len(images) if call.error is None else None)
+
+    if call.error is not None:
+        error = ProviderError(source, call.error)
+        # Um timeout é uma amostra censurada: registrá-la deixa o timeout crescer se estiver curto demais
+        if error.is_timeout:
+            latency_tracker.record(source, elapsed)
+        raise error
+    latency_tracker.record(source, elapsed)
+    return images
+
+
+def cache_key(source: str, query: str, page: int, per_page: int, order_by: str) -> Tuple[str, str]:
+    """Chave de cache da chamada e o order_by efetivo (fontes sem ordenação sempre usam 'relevant')"""
+    if not PROVIDERS[source].supports_order_by:
+        order_by = 'relevant'
+    return result_cache.make_key(source, query, page, per_page, order_by), order_by
+
+
+async def _fetch_and_store(source: str, key: str, query: str, page: int, per_page: int, order_by: str,
+                           background: bool = False) -> List[ImageSource]:
+    breaker = circuit_breakers.get(source)
+    if background:
+        # Prefetch: não ocupa a sonda do half-open, não espera por cota e não dispara hedge
+        if breaker.state != CLOSED:
+            raise CircuitOpenError(source)
+        if not await rate_limiter.try_acquire(source):
+            raise RateLimitedError(source, 0.0)
+    else:
+        if not breaker.allow():
+            raise CircuitOpenError(source)
+        try:
+            await rate_limiter.acquire(source)
+        except (RateLimitedError, asyncio.CancelledError):
+            breaker.release()
+            raise
+    start = time.perf_counter()
+    try:
+        if background:
+            images = await fetch_provider(source, query, page, per_page, order_by)
+        else:
+            images = await hedging_policy.run(
+                source, lambda: fetch_provider(source, query, page, per_page, order_by)
+            )
+    except ProviderError:
+        breaker.record_failure()
+        raise
+    except asyncio.CancelledError:
+        # Prazo curto escolhido pelo cliente ou desconexão não dizem nada sobre a fonte; já uma chamada
+        # que passou do limiar de lentidão sem responder conta como falha (o timeout do serviço, de
+        # 10-15 s, nunca chega a disparar antes do prazo padrão da busca)
+        if not background and time.perf_counter() - start >= latency_tracker.slow_threshold(source):
+            breaker.record_failure()
+        else:
+            breaker.release()
+        raise
+    breaker.record_success()
+    await result_cache.set(source, key, images, prefetched=background)
+    local_index.add(source, images)
+    return images
+
+
+async def search_provider(source: str, query: str, page: int, per_page: int, order_by: str) -> List[ImageSource]:
+    """Busca em uma fonte passando pelo cache de resultados"""
+    key, order_by = cache_key(source, query, page, per_page, order_by)
+
+    cached = await result_cache.get(source, key)
+    if cached is not None:
+        return cached
+
+    return await provider_flight.do(
+        key, lambda: _fetch_and_store(source, key, query, page, per_page, order_by)
+    )
+
+
+async def prefetch_provider(source: str, query: str, page: int, per_page: int, order_by: str) -> bool:
+    """Traz a página para o cache em segundo plano; False se ela já estava lá"""
+    key, order_by = cache_key(source, query, page, per_page, order_by)
+    if await result_cache.contains(key):
+        return False
+    await provider_flight.do(
+        key, lambda: _fetch_and_store(source, key, query, page, per_page, order_by, background=True)
+    )
+    return True
@@ -1,7 +1,8 @@
-import httpx
 from typing import List
 from config import get_settings
 from schemas import ImageSource
+from services.http_client import http_client
+from services.provider_call import call_timeout, report_error
 
 class PulsarImagensService:
     def __init__(self):
@@ -23,15 +24,15 @@ class PulsarImagensService:
                 'per_page': min(per_page, 50)
             }
             
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/api/search",
-                    headers=headers,
-                    params=params,
-                    timeout=10.0
-                )
-                response.raise_for_status()
-                data = response.json()
+            client = http_client.client
+            response = await client.get(
+                f"{self.base_url}/api/search",
+                headers=headers,
+                params=params,
+                timeout=call_timeout(10.0)
+            )
+            response.raise_for_status()
+            data = response.json()
             
             images = []
             for item in data.get('results', []):
@@ -52,6 +53,7 @@ class PulsarImagensService:
             return images
         except Exception as e:
             print(f"Erro ao buscar Pulsar Imagens: {e}")
+            report_error(e)
             return []
 
 pulsar_service = PulsarImagensService()
\ No newline at end of file
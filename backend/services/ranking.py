@@ -0,0 +1,129 @@
+import heapq
+import re
+import unicodedata
+from typing import Dict, List
+import numpy as np
+from config import get_settings
+from schemas import ImageSource
+
+_TOKEN_RE = re.compile(r'\w+')
+
+
+def tokenize(text: str) -> List[str]:
+    # Sem acentos, para "onibus" casar com "ônibus"
+    text = unicodedata.normalize('NFKD', text.lower())
+    return _TOKEN_RE.findall(''.join(char for char in text if not unicodedata.combining(char)))
+
+
+def _document(image: ImageSource) -> str:
+    # Na Pixabay as tags vêm no description
+    return f"{image.title} {image.description or ''}"
+
+
+def bm25_scores(query: str, documents: List[str]) -> np.ndarray:
+    """BM25 de cada documento contra a query, calculado de uma vez para o lote inteiro"""
+    settings = get_settings()
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not terms or not documents:
+        return np.zeros(len(documents))
+
+    column = {term: index for index, term in enumerate(terms)}
+    n = len(documents)
+    lengths = np.empty(n)
+    # Só as ocorrências dos termos da query importam: viram células (doc, termo) da matriz tf
+    cells = []
+    for row, document in enumerate(documents):
+        tokens = tokenize(document)
+        lengths[row] = len(tokens)
+        cells.extend(row * len(terms) + column[token] for token in tokens if token in column)
+    tf = np.bincount(np.array(cells, dtype=np.int64), minlength=n * len(terms)).reshape(n, len(terms)).astype(float)
+
+    df = np.count_nonzero(tf, axis=0)
+    idf = np.log1p((n - df + 0.5) / (df + 0.5))
+    avgdl = max(lengths.mean(), 1.0)
+    k1, b = settings.bm25_k1, settings.bm25_b
+    norm = k1 * (1 - b + b * lengths / avgdl)
+    return (idf * tf * (k1 + 1) / (tf + norm[:, None])).sum(axis=1)
+
+
+def concat(results: Dict[str, List[ImageSource]], source_list: List[str]) -> List[ImageSource]:
+    images = []
+    for source in source_list:
+        images.extend(results.get(source, []))
+    return images
+
+
+def round_robin(results: Dict[str, List[ImageSource]], source_list: List[str]) -> List[ImageSource]:
+    lists = [results[source] for source in source_list if results.get(source)]
+    images = []
+    for position in range(max((len(items) for items in lists), default=0)):
+        images.extend(items[position] for items in lists if position < len(items))
+    return images
+
+
+def scored(results: Dict[str, List[ImageSource]], source_list: List[str], query: str) -> List[ImageSource]:
+    """Ordena por BM25 misturado à posição original na fonte, intercalando as fontes.
+
+    Cada fonte já ordena por relevância, então a posição entra como prior (1 no topo, ~0 no fim).
+    O n-ésimo item de uma mesma fonte é multiplicado por rank_source_decay^n, o que espalha as
+    fontes pela lista sem impedir que uma fonte muito melhor apareça várias vezes no topo.
+    """
+    settings = get_settings()
+    images = concat(results, source_list)
+    if not images:
+        return images
+
+    lists = [results[source] for source in source_list if results.get(source)]
+    sources = np.concatenate([np.full(len(items), index) for index, items in enumerate(lists)])
+    positions = np.concatenate([np.arange(len(items)) for items in lists])
+    counts = np.concatenate([np.full(len(items), len(items)) for items in lists])
+    prior = 1 - positions / counts
+
+    relevance = bm25_scores(query, [_document(image) for image in images])
+    if relevance.max() > 0:
+        relevance = relevance / relevance.max()
+    weight = settings.rank_bm25_weight
+    score = weight * relevance + (1 - weight) * prior
+
+    # Posição de cada item dentro da sua fonte depois de ordenar pelo score
+    order = np.lexsort((-score, sources))
+    within = np.empty(len(images), dtype=int)
+    starts = np.searchsorted(sources[order], sources[order])
+    within[order] = np.arange(len(images)) - starts
+    score = score * settings.rank_source_decay ** within
+
+    return [images[index] for index in np.argsort(-score, kind='stable')]
+
+
+def _published_at(image: ImageSource) -> str:
+    return image.published_at
+
+
+def by_date(results: Dict[str, List[ImageSource]], source_list: List[str], order_by: str) -> List[ImageSource]:
+    """Ordem global por data: k-way merge (heap) das listas já ordenadas de cada fonte.
+
+    Roda depois que todas as fontes responderam (não é um merge incremental do stream). As fontes
+    que respeitam order_by chegam em ordem e o sort local é praticamente linear; o resto é ordenado
+    só dentro da própria lista. Imagens sem data vão para o fim, intercalando as fontes.
+    """
+    newest_first = order_by == 'latest'
+    streams = []
+    undated = {}
+    for source in source_list:
+        images = results.get(source, [])
+        streams.append(sorted((image for image in images if image.published_at), key=_published_at, reverse=newest_first))
+        undated[source] = [image for image in images if not image.published_at]
+    merged = heapq.merge(*streams, key=_published_at, reverse=newest_first)
+    return [*merged, *round_robin(undated, source_list)]
+
+
+def merge_results(results: Dict[str, List[ImageSource]], source_list: List[str], query: str, rank: str,
+                  order_by: str = 'relevant') -> List[ImageSource]:
+    """Combina os resultados das fontes; latest/oldest impõem a ordem por data e ignoram `rank`"""
+    if order_by in ('latest', 'oldest'):
+        return by_date(results, source_list, order_by)
+    if rank == 'round_robin':
+        return round_robin(results, source_list)
+    if rank == 'scored':
+        return scored(results, source_list, query)
+    return concat(results, source_list)
@@ -0,0 +1,212 @@
+import asyncio
+import time
+from typing import Dict, Optional
+import httpx
+from pymongo import ReturnDocument
+from config import get_settings
+from services.database import database
+from services.http_client import http_client
+from services.provider_call import current_call
+
+
+class RateLimitedError(Exception):
+    """A cota da fonte acabou e a espera passaria do limite: a chamada foi pulada"""
+    def __init__(self, source: str, retry_after: float):
+        super().__init__(f"{source}: rate limited (retry in {retry_after:.1f}s)")
+        self.source = source
+        self.retry_after = retry_after
+
+
+class QuotaState:
+    """Token bucket de uma fonte e o que a própria API informou nos headers"""
+    def __init__(self, capacity: Optional[int], period: Optional[float]):
+        self.capacity = capacity
+        self.rate = capacity / period if capacity else None
+        self.period = period
+        self.tokens = float(capacity or 0)
+        self.updated_at = time.time()
+        self.blocked_until = 0.0
+        self.upstream_limit: Optional[int] = None
+        self.upstream_remaining: Optional[int] = None
+        self.queued = 0
+        self.denied = 0
+
+    def take_local(self, now: float) -> float:
+        """Tenta retirar um token; retorna 0 se conseguiu ou quantos segundos esperar"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+def _header_number(headers: httpx.Headers, name: str) -> Optional[float]:
+    value = headers.get(name)
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class RateLimiter:
+    """Limitador por fonte: token bucket compartilhado entre workers via MongoDB (com fallback local),
+    ajustado pelos headers X-Ratelimit-* e por respostas 429.
+    """
+    def __init__(self):
+        self.settings = get_settings()
+        self._states: Dict[str, QuotaState] = {}
+        self._pending_writes = set()
+
+    def _state(self, source: str) -> QuotaState:
+        state = self._states.get(source)
+        if state is None:
+            capacity, period = None, None
+            spec = self.settings.rate_limits.get(source)
+            if spec:
+                # Formato "requisições/segundos", ex.: "50/3600"
+                capacity, period = spec.split('/')
+                capacity, period = int(capacity), float(period)
+            state = self._states[source] = QuotaState(capacity, period)
+        return state
+
+    @property
+    def _collection(self):
+        return database.db[self.settings.rate_limit_collection]
+
+    def _mongo_available(self) -> bool:
+        return self.settings.rate_limit_shared and database.available()
+
+    def _mongo_failed(self, e: Exception):
+        database.mark_failed(e, "rate limiter, usando estado local")
+
+    async def _take_shared(self, source: str, state: QuotaState, now: float) -> float:
+        # Refill + retirada atômicos num único update com pipeline
+        tokens = {'$ifNull': ['$tokens', state.capacity]}
+        elapsed = {'$subtract': [now, {'$ifNull': ['$updated_at', now]}]}
+        refilled = {'$min': [state.capacity, {'$add': [tokens, {'$multiply': [elapsed, state.rate]}]}]}
+        doc = await self._collection.find_one_and_update(
+            {'_id': source},
+            [
+                {'$set': {'tokens': refilled, 'updated_at': now}},
+                {'$set': {'granted': {'$and': [
+                    {'$gte': ['$tokens', 1]},
+                    {'$gte': [now, {'$ifNull': ['$blocked_until', 0]}]}
+                ]}}},
+                {'$set': {'tokens': {'$cond': ['$granted', {'$subtract': ['$tokens', 1]}, '$tokens']}}}
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        state.tokens = doc['tokens']
+        state.updated_at = now
+        state.blocked_until = max(state.blocked_until, doc.get('blocked_until', 0))
+        if doc['granted']:
+            return 0.0
+        if state.blocked_until > now:
+            return state.blocked_until - now
+        return (1 - doc['tokens']) / state.rate
+
+    async def _take(self, source: str, state: QuotaState) -> float:
+        now = time.time()
+        if state.blocked_until > now:
+            return state.blocked_until - now
+        if state.capacity is None:
+            return 0.0
+        if self._mongo_available():
+            try:
+                return await self._take_shared(source, state, now)
+            except Exception as e:
+                self._mongo_failed(e)
+        return state.take_local(now)
+
+    async def acquire(self, source: str):
+        """Aguarda um token (até rate_limit_max_wait_s); além disso levanta RateLimitedError"""
+        if not self.settings.rate_limit_enabled:
+            return
+        state = self._state(source)
+        waited = 0.0
+        while True:
+            wait = await self._take(source, state)
+            if wait <= 0:
+                return
+            if waited + wait > self.settings.rate_limit_max_wait_s:
+                state.denied += 1
+                raise RateLimitedError(source, wait)
+            state.queued += 1
+            await asyncio.sleep(wait)
+            waited += wait
+
+    async def try_acquire(self, source: str) -> bool:
+        """Versão sem espera, para chamadas opcionais (hedging, prefetch)"""
+        if not self.settings.rate_limit_enabled:
+            return True
+        return await self._take(source, self._state(source)) <= 0
+
+    async def observe(self, response: httpx.Response):
+        """Hook do cliente HTTP: aprende a cota real a partir dos headers da resposta"""
+        call = current_call.get()
+        if call is None or not self.settings.rate_limit_enabled:
+            return
+        state = self._state(call.source)
+        headers = response.headers
+        now = time.time()
+
+        limit = _header_number(headers, 'x-ratelimit-limit')
+        remaining = _header_number(headers, 'x-ratelimit-remaining')
+        reset = _header_number(headers, 'x-ratelimit-reset')
+        if reset is not None and reset < 1e9:
+            # Algumas APIs mandam segundos até o reset, outras o timestamp
+            reset = now + reset
+
+        blocked_until = None
+        if limit is not None:
+            state.upstream_limit = int(limit)
+        if remaining is not None:
+            state.upstream_remaining = int(remaining)
+            if state.capacity is not None:
+                state.tokens = min(state.tokens, remaining)
+            if remaining <= 0 and reset is not None:
+                blocked_until = reset
+        if response.status_code == 429:
+            retry_after = _header_number(headers, 'retry-after')
+            blocked_until = now + retry_after if retry_after is not None else (reset or now + self.settings.rate_limit_default_block_s)
+
+        if blocked_until is not None:
+            state.blocked_until = max(state.blocked_until, blocked_until)
+        if self._mongo_available() and (blocked_until is not None or (remaining is not None and state.capacity is not None)):
+            task = asyncio.create_task(self._share_observation(call.source, remaining, blocked_until))
+            self._pending_writes.add(task)
+            task.add_done_callback(self._pending_writes.discard)
+
+    async def _share_observation(self, source: str, remaining: Optional[float], blocked_until: Optional[float]):
+        update = {}
+        if remaining is not None:
+            update['$min'] = {'tokens': remaining}
+        if blocked_until is not None:
+            update['$max'] = {'blocked_until': blocked_until}
+        try:
+            await self._collection.update_one({'_id': source}, update, upsert=True)
+        except Exception as e:
+            self._mongo_failed(e)
+
+    def snapshot(self, source: str) -> dict:
+        state = self._state(source)
+        now = time.time()
+        remaining = None
+        if state.capacity is not None:
+            remaining = int(min(state.capacity, state.tokens + (now - state.updated_at) * state.rate))
+        return {
+            'limit': state.capacity,
+            'period_s': state.period,
+            'remaining': remaining,
+            'upstream_limit': state.upstream_limit,
+            'upstream_remaining': state.upstream_remaining,
+            'blocked_for_s': round(max(0.0, state.blocked_until - now), 1),
+            'queued': state.queued,
+            'denied': state.denied
+        }
+
+
+rate_limiter = RateLimiter()
+http_client.add_response_hook(rate_limiter.observe)
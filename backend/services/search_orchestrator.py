@@ -0,0 +1,137 @@
+import asyncio
+import time
+from contextlib import aclosing
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from config import get_settings
+from schemas import ImageSource, SourceStatus
+from services.providers import is_configured, search_provider
+from services.provider_call import ProviderError
+from services.circuit_breaker import CircuitOpenError
+from services.rate_limiter import RateLimitedError
+from services.pagination import PagePlan
+from services.metrics import search_fanout
+
+SourceResult = Tuple[str, List[ImageSource], SourceStatus]
+# Recebe o id da fonte e devolve as imagens dela (página simples, janela do cursor, ...)
+SourceCall = Callable[[str], Awaitable[List[ImageSource]]]
+
+
+async def _run_source(source: str, make_call: SourceCall) -> SourceResult:
+    start = time.perf_counter()
+    try:
+        images = await make_call(source)
+        status = SourceStatus(status='ok', result_count=len(images))
+    except CircuitOpenError:
+        images = []
+        status = SourceStatus(status='skipped', error='circuit open')
+    except RateLimitedError as e:
+        images = []
+        status = SourceStatus(status='skipped', error=f'rate limited (retry in {e.retry_after:.0f}s)')
+    except ProviderError as e:
+        images = []
+        status = SourceStatus(status='timeout' if e.is_timeout else 'error', error=repr(e.cause))
+    except Exception as e:
+        images = []
+        status = SourceStatus(status='error', error=repr(e))
+    status.time_ms = (time.perf_counter() - start) * 1000
+    return source, images, status
+
+
+def page_call(query: str, page: int, per_page: int, order_by: str) -> SourceCall:
+    """Chamada clássica: a mesma página/per_page em todas as fontes"""
+    return lambda source: search_provider(source, query, page, per_page, order_by)
+
+
+async def iter_search(source_list: List[str], make_call: SourceCall, deadline_ms: int,
+                      skip: Optional[Dict[str, str]] = None) -> AsyncIterator[SourceResult]:
+    """Dispara todas as fontes e entrega cada resultado assim que ele chega.
+
+    Quando o prazo (deadline_ms) expira, as fontes pendentes são canceladas e
+    entregues com status 'timeout'. Fontes em `skip` (id -> motivo) não são chamadas.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + deadline_ms / 1000
+
+    tasks: Dict[asyncio.Task, str] = {}
+    for source in source_list:
+        if not is_configured(source):
+            yield source, [], SourceStatus(status='skipped', error='not configured')
+            continue
+        if skip and source in skip:
+            yield source, [], SourceStatus(status='skipped', error=skip[source])
+            continue
+        task = asyncio.create_task(_run_source(source, make_call))
+        tasks[task] = source
+    if tasks:
+        search_fanout.observe(len(tasks))
+
+    pending = set(tasks)
+    try:
+        while pending:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+
+        for task in pending:
+            task.cancel()
+        for task in pending:
+            yield tasks[task], [], SourceStatus(status='timeout', time_ms=deadline_ms, error='deadline exceeded')
+        pending = set()
+    finally:
+        # Consumidor abandonou o iterador (ex.: cliente desconectou)
+        for task in pending:
+            task.cancel()
+
+
+async def iter_plan(source_list: List[str], plan: PagePlan, query: str, order_by: str, deadline_ms: int,
+                    skip: Optional[Dict[str, str]] = None) -> AsyncIterator[SourceResult]:
+    """iter_search no modo cursor: após a primeira rodada, redistribui o que faltou para o per_page
+    entre as fontes que ainda têm itens, enquanto houver prazo.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + deadline_ms / 1000
+    make_call: SourceCall = lambda source: plan.fetch(source, query, order_by)
+
+    async with aclosing(iter_search(source_list, make_call, deadline_ms, skip)) as results:
+        async for result in results:
+            yield result
+
+    settings = get_settings()
+    for _ in range(settings.allocation_max_rounds - 1):
+        remaining_ms = int((deadline - loop.time()) * 1000)
+        if remaining_ms < settings.allocation_min_round_ms:
+            break
+        sources = plan.top_up()
+        if not sources:
+            break
+        async with aclosing(iter_search(sources, make_call, remaining_ms)) as results:
+            async for result in results:
+                yield result
+
+
+def merge_status(previous: Optional[SourceStatus], status: SourceStatus) -> SourceStatus:
+    """Combina o status de rodadas diferentes da mesma fonte"""
+    if previous is None:
+        return status
+    merged = previous.model_copy()
+    merged.result_count += status.result_count
+    merged.time_ms = (previous.time_ms or 0) + (status.time_ms or 0)
+    # Falha numa rodada extra não invalida o que a primeira já entregou
+    if previous.status != 'ok':
+        merged.status = status.status
+        merged.error = status.error
+    return merged
+
+
+async def gather_search(results: AsyncIterator[SourceResult]) -> Tuple[Dict[str, List[ImageSource]], Dict[str, SourceStatus]]:
+    """Consome iter_search/iter_plan e agrega resultados e status por fonte"""
+    images_by_source: Dict[str, List[ImageSource]] = {}
+    statuses: Dict[str, SourceStatus] = {}
+    async with aclosing(results):
+        async for source, images, status in results:
+            images_by_source.setdefault(source, []).extend(images)
+            statuses[source] = merge_status(statuses.get(source), status)
+    return images_by_source, statuses
@@ -1,77 +1,67 @@
-import httpx
 from typing import List
 from config import get_settings
 from schemas import ImageSource
+from services.http_client import http_client
+from services.oauth_token_manager import OAuthTokenManager, oauth_tokens
+from services.provider_call import call_timeout, report_error
+from services.timestamps import normalize_timestamp
 import base64
 
 class ShutterstockService:
     def __init__(self):
         self.settings = get_settings()
         self.base_url = "https://api.shutterstock.com/v2"
-        self._access_token = None
+        self.tokens = oauth_tokens.register(OAuthTokenManager(
+            'shutterstock',
+            f"{self.base_url}/oauth/access_token",
+            self._token_request,
+            self._is_configured
+        ))
     
-    async def _get_access_token(self):
-        """Obtém access token OAuth2 do Shutterstock"""
-        if self._access_token:
-            return self._access_token
-            
-        try:
-            credentials = f"{self.settings.shutterstock_client_id}:{self.settings.shutterstock_client_secret}"
-            encoded_credentials = base64.b64encode(credentials.encode()).decode()
-            
-            headers = {
-                'Authorization': f'Basic {encoded_credentials}',
+    def _is_configured(self) -> bool:
+        return bool(self.settings.shutterstock_client_id and self.settings.shutterstock_client_secret)
+    
+    def _basic_auth(self) -> str:
+        credentials = f"{self.settings.shutterstock_client_id}:{self.settings.shutterstock_client_secret}"
+        return f"Basic {base64.b64encode(credentials.encode()).decode()}"
+    
+    def _token_request(self) -> dict:
+        """Requisição OAuth2 (client credentials) do access token Shutterstock"""
+        return {
+            'headers': {
+                'Authorization': self._basic_auth(),
                 'Content-Type': 'application/x-www-form-urlencoded'
-            }
-            data = {
+            },
+            'data': {
                 'grant_type': 'client_credentials',
                 'realm': 'customer'
             }
-            
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    'https://api.shutterstock.com/v2/oauth/access_token',
-                    headers=headers,
-                    data=data,
-                    timeout=10.0
-                )
-                response.raise_for_status()
-                token_data = response.json()
-                self._access_token = token_data['access_token']
-                return self._access_token
-        except Exception as e:
-            print(f"Erro ao obter token Shutterstock: {e}")
-            return None
+        }
     
-    async def search_images(self, query: str, page: int = 1, per_page: int = 20) -> List[ImageSource]:
-        if not self.settings.shutterstock_client_id or not self.settings.shutterstock_client_secret:
+    async def search_images(self, query: str, page: int = 1, per_page: int = 20, order_by: str = 'relevant') -> List[ImageSource]:
+        if not self._is_configured():
             return []
         
         try:
-            # Tentar primeiro com Basic Auth (para contas Enterprise)
-            credentials = f"{self.settings.shutterstock_client_id}:{self.settings.shutterstock_client_secret}"
-            encoded_credentials = base64.b64encode(credentials.encode()).decode()
-            
-            headers = {
-                'Authorization': f'Basic {encoded_credentials}',
-                'User-Agent': 'LuminaSearchAPI/1.0'
-            }
+            headers = {'User-Agent': 'LuminaSearchAPI/1.0'}
             params = {
                 'query': query,
                 'per_page': min(per_page, 100),
                 'page': page,
-                'view': 'minimal'
+                'view': 'minimal',
+                # A API só ordena do mais novo; "oldest" fica por conta da ordenação local
+                'sort': 'newest' if order_by == 'latest' else 'relevance'
             }
             
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/images/search",
-                    headers=headers,
-                    params=params,
-                    timeout=10.0
-                )
-                response.raise_for_status()
-                data = response.json()
+            url = f"{self.base_url}/images/search"
+            if await self.tokens.get_token():
+                response = await self.tokens.request('GET', url, headers=headers, params=params, timeout=call_timeout(10.0))
+            else:
+                # Sem token OAuth, tenta com Basic Auth (contas Enterprise)
+                headers['Authorization'] = self._basic_auth()
+                response = await http_client.client.get(url, headers=headers, params=params, timeout=call_timeout(10.0))
+            response.raise_for_status()
+            data = response.json()
             
             images = []
             for item in data.get('data', []):
@@ -87,11 +77,13 @@ class ShutterstockService:
                     source_url=f"https://www.shutterstock.com/image-photo/{item['id']}",
                     download_url='',
                     license='paid',
-                    image_id=str(item['id'])
+                    image_id=str(item['id']),
+                    published_at=normalize_timestamp(item.get('added_date'))
                 ))
             return images
         except Exception as e:
             print(f"Erro ao buscar Shutterstock: {e}")
+            report_error(e)
             return []
 
 shutterstock_service = ShutterstockService()
\ No newline at end of file
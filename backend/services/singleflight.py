@@ -0,0 +1,60 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class _Flight:
+    __slots__ = ('task', 'waiters')
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Deduplica chamadas concorrentes: quem chega com a mesma chave aguarda a mesma tarefa"""
+    def __init__(self):
+        self._inflight: Dict[Hashable, _Flight] = {}
+        self._counters = {
+            'calls': 0,
+            'executed': 0,
+            'coalesced': 0
+        }
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self._counters['calls'] += 1
+        flight = self._inflight.get(key)
+        if flight is None:
+            self._counters['executed'] += 1
+            flight = _Flight(asyncio.ensure_future(fn()))
+            self._inflight[key] = flight
+            flight.task.add_done_callback(lambda _, flight=flight: self._forget(key, flight))
+        else:
+            self._counters['coalesced'] += 1
+
+        flight.waiters += 1
+        try:
+            # shield: se um dos chamadores for cancelado, os demais continuam aguardando
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            # Ninguém mais espera pelo resultado: cancela a chamada de fato. A chave sai na hora, e não só
+            # quando a tarefa terminar (a limpeza pode esperar, ex.: httpx fechando a conexão): quem
+            # chegar nesse intervalo começa um voo novo em vez de herdar o cancelamento
+            if flight.waiters == 1 and not flight.task.done():
+                flight.task.cancel()
+                self._forget(key, flight)
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def _forget(self, key: Hashable, flight: _Flight):
+        # Só remove se a chave ainda for deste voo (pode já haver um voo novo com a mesma chave)
+        if self._inflight.get(key) is flight:
+            del self._inflight[key]
+
+    def stats(self) -> dict:
+        return {**self._counters, 'in_flight': len(self._inflight)}
+
+
+# Nível da requisição inteira (/api/search) e nível de cada chamada a uma fonte
+request_flight = SingleFlight()
+provider_flight = SingleFlight()
@@ -0,0 +1,260 @@
+import asyncio
+import hashlib
+import io
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple, Optional, Tuple
+from config import get_settings
+from services.http_client import http_client
+from services.image_registry import image_registry
+from services.singleflight import SingleFlight
+
+try:
+    from PIL import Image, ImageOps
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+
+class ThumbnailNotFoundError(LookupError):
+    pass
+
+
+class ThumbnailUnavailableError(Exception):
+    """A fonte não entregou uma imagem utilizável"""
+
+
+class Thumbnail(NamedTuple):
+    path: str
+    etag: str
+
+
+def downscale(data: bytes, width: int, quality: int) -> Optional[bytes]:
+    """Executa no pool de processos: reduz para no máximo `width` de largura, em JPEG (None se não for imagem)"""
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            if image.width <= width and image.format == 'JPEG':
+                # Já é pequena: recodificar só perderia qualidade
+                return data
+            # draft: o decodificador JPEG já reduz em potências de 2, sem decodificar a imagem inteira
+            image.draft('RGB', (width, max(1, image.height * width // max(1, image.width))))
+            image = ImageOps.exif_transpose(image).convert('RGB')
+            if image.width > width:
+                image = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+            output = io.BytesIO()
+            image.save(output, 'JPEG', quality=quality, progressive=True)
+            return output.getvalue()
+    except Exception:
+        return None
+
+
+class ThumbnailStore:
+    """Cache em disco endereçado por conteúdo.
+
+    blobs/ab/<sha256>.jpg guarda cada miniatura uma vez (fontes diferentes com a mesma foto
+    compartilham o arquivo); refs/<chave> aponta a URL de origem + largura para o sha256.
+    Quando o total passa de thumb_cache_max_bytes, os blobs menos usados (mtime, renovado a
+    cada acerto) são apagados até 90% do limite.
+    """
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.evicted = 0
+        self._evicting = threading.Lock()
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.root, 'blobs', digest[:2], f"{digest}.jpg")
+
+    def _ref_path(self, key: str) -> str:
+        return os.path.join(self.root, 'refs', key[:2], key)
+
+    @staticmethod
+    def _write_atomic(path: str, data: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as file:
+            file.write(data)
+        os.replace(temp_path, path)
+
+    def scan(self):
+        """Soma o tamanho dos blobs existentes (startup)"""
+        total = 0
+        for directory, _, files in os.walk(os.path.join(self.root, 'blobs')):
+            for name in files:
+                try:
+                    total += os.stat(os.path.join(directory, name)).st_size
+                except FileNotFoundError:
+                    pass
+        self.total_bytes = total
+
+    def lookup(self, key: str) -> Optional[Tuple[str, str]]:
+        try:
+            with open(self._ref_path(key)) as file:
+                digest = file.read().strip()
+            path = self._blob_path(digest)
+            os.utime(path)
+        except (FileNotFoundError, OSError):
+            return None
+        return path, digest
+
+    def store(self, key: str, data: bytes) -> Tuple[str, str]:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            self._write_atomic(path, data)
+            self.total_bytes += len(data)
+        else:
+            os.utime(path)
+        self._write_atomic(self._ref_path(key), digest.encode())
+        # Uma varredura por vez; as outras threads seguem sem esperar
+        if self.total_bytes > self.max_bytes and self._evicting.acquire(blocking=False):
+            try:
+                self.evict(int(self.max_bytes * 0.9))
+            finally:
+                self._evicting.release()
+        return path, digest
+
+    def evict(self, target_bytes: int):
+        blobs = []
+        for directory, _, files in os.walk(os.path.join(self.root, 'blobs')):
+            for name in files:
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                blobs.append((stat.st_mtime, stat.st_size, path))
+        blobs.sort()
+        total = sum(size for _, size, _ in blobs)
+        removed = set()
+        for _, size, path in blobs:
+            if total <= target_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed.add(os.path.basename(path)[:-len('.jpg')])
+        self.total_bytes = total
+        self.evicted += len(removed)
+        if removed:
+            self._drop_refs(removed)
+
+    def _drop_refs(self, digests: set):
+        for directory, _, files in os.walk(os.path.join(self.root, 'refs')):
+            for name in files:
+                path = os.path.join(directory, name)
+                try:
+                    with open(path) as file:
+                        if file.read().strip() in digests:
+                            os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+
+class ThumbnailService:
+    """Proxy de miniaturas: baixa a imagem da fonte uma vez pelo cliente HTTP compartilhado,
+    reduz num ProcessPoolExecutor e serve do cache em disco.
+
+    Só são servidas imagens que passaram por uma busca (image_registry): o endpoint nunca busca
+    uma URL arbitrária vinda do cliente.
+    """
+    def __init__(self):
+        self.settings = get_settings()
+        self.store = ThumbnailStore(self.settings.thumb_cache_dir, self.settings.thumb_cache_max_bytes)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._downloads: Optional[asyncio.Semaphore] = None
+        self._flight = SingleFlight()
+        self._counters = {'disk_hits': 0, 'generated': 0, 'not_found': 0, 'failed': 0}
+
+    @property
+    def available(self) -> bool:
+        return PIL_AVAILABLE and self.settings.thumb_enabled
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: mesmo motivo do pool do hash perceptual (threads no processo da API)
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.settings.thumb_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._pool
+
+    async def start(self):
+        if not self.available:
+            return
+        await asyncio.to_thread(self.store.scan)
+        loop = asyncio.get_running_loop()
+        executor = self._executor()
+        await asyncio.gather(*(loop.run_in_executor(executor, downscale, b'', 1, 1)
+                               for _ in range(self.settings.thumb_workers)))
+
+    async def get(self, source: str, image_id: str, width: int) -> Thumbnail:
+        image = await image_registry.lookup(source, image_id)
+        url = image.thumbnail_url if image is not None else None
+        if not url:
+            self._counters['not_found'] += 1
+            raise ThumbnailNotFoundError(f"{source}/{image_id}")
+
+        key = hashlib.sha1(f"{url}|{width}|{self.settings.thumb_quality}".encode()).hexdigest()
+        found = await asyncio.to_thread(self.store.lookup, key)
+        if found is None:
+            found = await self._flight.do(key, lambda: self._generate(key, url, width))
+        else:
+            self._counters['disk_hits'] += 1
+        path, digest = found
+        return Thumbnail(path, f'"{digest[:32]}"')
+
+    async def _download(self, url: str) -> bytes:
+        if self._downloads is None:
+            self._downloads = asyncio.Semaphore(self.settings.thumb_max_downloads)
+        async with self._downloads:
+            async with http_client.client.stream(
+                'GET', url, timeout=self.settings.thumb_download_timeout_s, follow_redirects=True
+            ) as response:
+                response.raise_for_status()
+                chunks, size = [], 0
+                async for chunk in response.aiter_bytes():
+                    size += len(chunk)
+                    if size > self.settings.thumb_max_source_bytes:
+                        raise ThumbnailUnavailableError(f"imagem maior que {self.settings.thumb_max_source_bytes} bytes")
+                    chunks.append(chunk)
+        return b''.join(chunks)
+
+    async def _generate(self, key: str, url: str, width: int) -> Tuple[str, str]:
+        try:
+            data = await self._download(url)
+        except ThumbnailUnavailableError:
+            self._counters['failed'] += 1
+            raise
+        except Exception as e:
+            self._counters['failed'] += 1
+            raise ThumbnailUnavailableError(repr(e))
+        loop = asyncio.get_running_loop()
+        thumbnail = await loop.run_in_executor(self._executor(), downscale, data, width, self.settings.thumb_quality)
+        if thumbnail is None:
+            self._counters['failed'] += 1
+            raise ThumbnailUnavailableError("a fonte não devolveu uma imagem")
+        self._counters['generated'] += 1
+        return await asyncio.to_thread(self.store.store, key, thumbnail)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def stats(self) -> dict:
+        return {
+            **self._counters,
+            'disk_bytes': self.store.total_bytes,
+            'evicted': self.store.evicted,
+            'in_flight': self._flight.stats()['in_flight']
+        }
+
+
+thumbnails = ThumbnailService()
@@ -0,0 +1,22 @@
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+
+def normalize_timestamp(value: Any) -> Optional[str]:
+    """Data da fonte (ISO-8601 com ou sem fuso, só a data, ou epoch) em ISO-8601 UTC.
+
+    O formato fixo "AAAA-MM-DDTHH:MM:SSZ" ordena corretamente como string.
+    """
+    if value is None or value == '':
+        return None
+    try:
+        if isinstance(value, (int, float)):
+            # Epoch em milissegundos em algumas APIs
+            moment = datetime.fromtimestamp(value / 1000 if value > 1e11 else value, tz=timezone.utc)
+        else:
+            moment = datetime.fromisoformat(str(value).strip())
+    except (ValueError, OverflowError, OSError):
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
@@ -0,0 +1,153 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+import httpx
+from services.http_client import http_client
+from services.provider_call import current_call
+
+# Eventos do trace do httpcore ("<prefixo>.<operação>.started/complete/failed") -> fase da chamada
+_PHASES = {
+    'connection.connect_tcp': 'connect',
+    'connection.start_tls': 'tls',
+    'http11.send_request_headers': 'send',
+    'http11.send_request_body': 'send',
+    'http2.send_connection_init': 'send',
+    'http2.send_request_headers': 'send',
+    'http2.send_request_body': 'send',
+    'http11.receive_response_headers': 'first_byte',
+    'http2.receive_response_headers': 'first_byte',
+    'http11.receive_response_body': 'body',
+    'http2.receive_response_body': 'body',
+}
+HTTP_PHASES = ('connect', 'tls', 'send', 'first_byte', 'body')
+PHASES = HTTP_PHASES + ('json', 'mapping')
+
+
+class CallTimings:
+    """Tempos (segundos) de uma chamada a uma fonte.
+
+    As fases HTTP vêm da extensão "trace" do httpcore, ligada pelo hook de requisição do cliente
+    compartilhado; o JSON, do response.json() embrulhado pelo hook de resposta; `mapping` é o
+    restante do search_images do serviço (adapter montando os ImageSource). O DNS não aparece
+    separado: o httpcore resolve o nome dentro do connect_tcp, então ele está em `connect`.
+    """
+    __slots__ = PHASES + ('total', 'requests', '_started')
+
+    def __init__(self):
+        for phase in PHASES:
+            setattr(self, phase, 0.0)
+        self.total = 0.0
+        self.requests = 0
+        self._started: Dict[str, float] = {}
+
+    async def trace(self, event: str, info: dict):
+        operation, _, stage = event.rpartition('.')
+        phase = _PHASES.get(operation)
+        if phase is None:
+            return
+        if stage == 'started':
+            self._started[operation] = time.perf_counter()
+            return
+        start = self._started.pop(operation, None)
+        if start is not None:
+            setattr(self, phase, getattr(self, phase) + time.perf_counter() - start)
+
+    def finish(self, total: float):
+        self.total = total
+        self.mapping = max(0.0, total - sum(getattr(self, phase) for phase in HTTP_PHASES) - self.json)
+
+
+class RequestTimings:
+    """Tempos de uma requisição da API: chamadas às fontes (por fonte) e etapas do servidor"""
+    def __init__(self):
+        self._start = time.perf_counter()
+        self.calls: Dict[str, List[CallTimings]] = {}
+        self.stages: Dict[str, float] = {}
+
+    def start_call(self, source: str) -> CallTimings:
+        timings = CallTimings()
+        self.calls.setdefault(source, []).append(timings)
+        return timings
+
+    def stage(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def providers(self) -> Dict[str, dict]:
+        """Por fonte; com várias chamadas (páginas do cursor, hedge) as fases são somadas"""
+        providers = {}
+        for source, calls in self.calls.items():
+            entry = {'calls': len(calls), 'requests': sum(call.requests for call in calls)}
+            for phase in PHASES + ('total',):
+                entry[f"{phase}_ms"] = round(sum(getattr(call, phase) for call in calls) * 1000, 2)
+            providers[source] = entry
+        return providers
+
+    def to_dict(self) -> dict:
+        return {
+            'total_ms': round((time.perf_counter() - self._start) * 1000, 2),
+            'stages': {f"{name}_ms": round(seconds * 1000, 2) for name, seconds in self.stages.items()},
+            'providers': self.providers()
+        }
+
+    def server_timing(self) -> str:
+        """Valor do header Server-Timing (fases zeradas ficam de fora)"""
+        entries = [f"total;dur={(time.perf_counter() - self._start) * 1000:.1f}"]
+        entries.extend(f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.stages.items())
+        for source, entry in self.providers().items():
+            entries.append(f'{source};dur={entry["total_ms"]:.1f};desc="{source} ({entry["calls"]} chamada(s))"')
+            entries.extend(f"{source}-{phase};dur={entry[f'{phase}_ms']:.1f}"
+                           for phase in PHASES if entry[f"{phase}_ms"] > 0)
+        return ', '.join(entries)
+
+
+current_timings: ContextVar[Optional[RequestTimings]] = ContextVar('current_timings', default=None)
+
+
+@contextmanager
+def record_stage(name: str):
+    """Mede uma etapa do servidor (fan-out, dedup, merge...) se a requisição atual coleta tempos"""
+    timings = current_timings.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings.stage(name, time.perf_counter() - start)
+
+
+def start_call(source: str) -> Optional[CallTimings]:
+    """CallTimings da nova chamada, se a requisição atual coleta tempos"""
+    timings = current_timings.get()
+    return timings.start_call(source) if timings is not None else None
+
+
+async def attach_trace(request: httpx.Request):
+    """Hook de requisição do cliente HTTP: liga o trace do httpcore às chamadas que coletam tempos"""
+    call = current_call.get()
+    if call is None or call.timings is None:
+        return
+    call.timings.requests += 1
+    request.extensions['trace'] = call.timings.trace
+
+
+async def time_json(response: httpx.Response):
+    """Hook de resposta: mede o response.json() que o serviço vai chamar"""
+    call = current_call.get()
+    if call is None or call.timings is None:
+        return
+    timings = call.timings
+    parse = response.json
+
+    def timed_json(**kwargs):
+        start = time.perf_counter()
+        try:
+            return parse(**kwargs)
+        finally:
+            timings.json += time.perf_counter() - start
+
+    response.json = timed_json
+
+
+http_client.add_request_hook(attach_trace)
+http_client.add_response_hook(time_json)
@@ -1,7 +1,9 @@
-import httpx
-from typing import List
+from typing import List, Optional
 from config import get_settings
 from schemas import ImageSource
+from services.http_client import http_client
+from services.provider_call import call_timeout, report_error
+from services.timestamps import normalize_timestamp
 
 class UnsplashService:
     def __init__(self):
@@ -31,15 +33,15 @@ class UnsplashService:
                 'order_by': unsplash_order
             }
             
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/search/photos",
-                    params=params,
-                    headers=headers,
-                    timeout=10.0
-                )
-                response.raise_for_status()
-                data = response.json()
+            client = http_client.client
+            response = await client.get(
+                f"{self.base_url}/search/photos",
+                params=params,
+                headers=headers,
+                timeout=call_timeout(10.0)
+            )
+            response.raise_for_status()
+            data = response.json()
             
             images = []
             for photo in data.get('results', []):
@@ -55,11 +57,35 @@ class UnsplashService:
                     source_url=photo['links']['html'],
                     download_url=photo['links']['download_location'],
                     license='free',
-                    image_id=photo['id']
+                    image_id=photo['id'],
+                    published_at=normalize_timestamp(photo.get('created_at'))
                 ))
             return images
         except Exception as e:
             print(f"Error searching Unsplash: {e}")
+            report_error(e)
             return []
+    
+    async def resolve_download(self, download_location: str) -> Optional[str]:
+        """URL do arquivo a partir do links.download_location (endpoint da API, que exige o Client-ID).
+
+        A chamada também registra o download, como pedem as diretrizes da API do Unsplash.
+        """
+        if not self.settings.unsplash_api_key or not download_location.startswith(f"{self.base_url}/"):
+            return None
+        try:
+            response = await http_client.client.get(
+                download_location,
+                headers={
+                    'Authorization': f'Client-ID {self.settings.unsplash_api_key}',
+                    'Accept-Version': 'v1'
+                },
+                timeout=10.0
+            )
+            response.raise_for_status()
+            return response.json().get('url')
+        except Exception as e:
+            print(f"Error resolving Unsplash download: {e}")
+            return None
 
 unsplash_service = UnsplashService()
\ No newline at end of file
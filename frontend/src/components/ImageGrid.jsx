@@ -12,6 +12,21 @@ const breakpointColumns = {
   640: 1
 };
 
+const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
+
+// Miniatura reduzida e em cache servida pelo backend (/api/thumb)
+const thumbUrl = (image, width) =>
+  `${BACKEND_URL}/api/thumb/${encodeURIComponent(image.source)}/${encodeURIComponent(image.image_id)}?w=${width}`;
+
+// Se o proxy falhar (imagem desconhecida neste worker, fonte fora do ar), usa a URL original
+const fallbackToOriginal = (image) => (event) => {
+  const img = event.currentTarget;
+  if (img.src !== image.thumbnail_url) {
+    img.removeAttribute('srcset');
+    img.src = image.thumbnail_url;
+  }
+};
+
 const getSourceLabel = (source) => {
   // Normalize source labels for display
   if (source.startsWith('cc_')) {
@@ -122,7 +137,10 @@ export const ImageGrid = ({ images, isLoading, searchQuery }) => {
               onClick={() => setSelectedImage(image)}
             >
               <img
-                src={image.thumbnail_url}
+                src={thumbUrl(image, 400)}
+                srcSet={`${thumbUrl(image, 400)} 400w, ${thumbUrl(image, 800)} 800w`}
+                sizes="(max-width: 640px) 100vw, (max-width: 1280px) 50vw, 33vw"
+                onError={fallbackToOriginal(image)}
                 alt={image.title}
                 className="w-full h-auto object-cover transition-all duration-500 group-hover:scale-105"
                 loading="lazy"
@@ -1,7 +1,50 @@
-import { useState, useCallback } from 'react';
-import axios from 'axios';
+import { useState, useCallback, useRef } from 'react';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
+const SEARCH_TIMEOUT_MS = 30000;
+
+// Lê o NDJSON de /api/search/stream e chama onEvent para cada linha recebida
+const streamSearch = async (params, onEvent, signal) => {
+  const response = await fetch(`${BACKEND_URL}/api/search/stream?${new URLSearchParams(params)}`, { signal });
+  if (!response.ok) {
+    let detail;
+    try {
+      detail = (await response.json()).detail;
+    } catch {
+      detail = null;
+    }
+    throw new Error(typeof detail === 'string' ? detail : 'Falha ao buscar imagens');
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    let newline;
+    while ((newline = buffer.indexOf('\n')) >= 0) {
+      const line = buffer.slice(0, newline).trim();
+      buffer = buffer.slice(newline + 1);
+      if (line) onEvent(JSON.parse(line));
+    }
+  }
+  if (buffer.trim()) onEvent(JSON.parse(buffer));
+};
+
+// latest/oldest: a ordem global por data só existe com todas as fontes em mãos, então a busca vai
+// para /api/search (já mesclada no backend) e é entregue como um único lote + resumo
+const fetchSearch = async (params, onEvent, signal) => {
+  const response = await fetch(`${BACKEND_URL}/api/search?${new URLSearchParams(params)}`, { signal });
+  const data = await response.json().catch(() => null);
+  if (!response.ok) {
+    const detail = data && data.detail;
+    throw new Error(typeof detail === 'string' ? detail : 'Falha ao buscar imagens');
+  }
+  onEvent({ type: 'source', images: data.images });
+  onEvent({ type: 'summary', ...data });
+};
 
 export const useImageSearch = () => {
   const [images, setImages] = useState([]);
@@ -15,8 +58,10 @@ export const useImageSearch = () => {
   const [searchTime, setSearchTime] = useState(0);
   const [sortBy, setSortBy] = useState('relevant');
   const [hasMore, setHasMore] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+  const abortRef = useRef(null);
 
-  const performSearch = useCallback(async (query, page = 1, sources = selectedSources, orderBy = sortBy, append = false) => {
+  const performSearch = useCallback(async (query, page = 1, sources = selectedSources, orderBy = sortBy, append = false, cursor = null) => {
     if (!query.trim()) {
       setError('Por favor, insira uma consulta de busca');
       return;
@@ -29,49 +74,74 @@ export const useImageSearch = () => {
     }
     setError(null);
 
+    // Uma nova busca cancela o stream anterior ainda em andamento
+    if (abortRef.current) abortRef.current.abort();
+    const controller = new AbortController();
+    abortRef.current = controller;
+    const timeoutId = setTimeout(() => controller.abort(), SEARCH_TIMEOUT_MS);
+
     try {
       const sourcesString = sources.join(',');
       console.log('🔍 Buscando com fontes:', sourcesString);
-      const response = await axios.get(`${BACKEND_URL}/api/search`, {
-        params: {
-          query,
-          page,
-          per_page: 50,
-          sources: sourcesString,
-          order_by: orderBy
-        },
-        timeout: 30000
-      });
-      console.log('✅ Resposta recebida:', response.data.total_results, 'imagens');
+      if (!append) {
+        setImages([]);
+      }
 
-      if (append) {
-        setImages(prev => [...prev, ...response.data.images]);
-      } else {
-        setImages(response.data.images);
+      // Sem `page` o backend pagina por cursor: per_page é o total e cada fonte avança pelo seu próprio offset
+      const params = {
+        query,
+        per_page: 50,
+        sources: sourcesString,
+        order_by: orderBy
+      };
+      if (cursor) {
+        params.cursor = cursor;
       }
-      
-      setTotalResults(response.data.total_results);
-      setSearchTime(response.data.search_time_ms);
+
+      let cursorAfter = null;
+      const search = orderBy === 'relevant' ? streamSearch : fetchSearch;
+      await search(params, (event) => {
+        if (event.type === 'source' && event.images.length > 0) {
+          setImages(prev => [...prev, ...event.images]);
+          // Exibe as primeiras imagens sem esperar a fonte mais lenta
+          setLoading(false);
+        } else if (event.type === 'summary') {
+          console.log('✅ Resposta recebida:', event.total_results, 'imagens');
+          setTotalResults(event.total_results);
+          setSearchTime(event.search_time_ms);
+          cursorAfter = event.next_cursor;
+        }
+      }, controller.signal);
+
       setSearchQuery(query);
       setCurrentPage(page);
-      // Considerar que há mais resultados se recebemos imagens
-      setHasMore(response.data.images.length > 0);
+      setNextCursor(cursorAfter);
+      // O cursor vem nulo quando todas as fontes se esgotaram
+      setHasMore(Boolean(cursorAfter));
     } catch (err) {
-      setError(err.response?.data?.detail || 'Falha ao buscar imagens');
+      if (controller.signal.aborted && abortRef.current !== controller) {
+        // Substituída por uma busca mais recente
+        return;
+      }
+      setError(err.name === 'AbortError' ? 'Tempo de busca esgotado' : (err.message || 'Falha ao buscar imagens'));
       if (!append) {
         setImages([]);
       }
     } finally {
-      setLoading(false);
-      setLoadingMore(false);
+      clearTimeout(timeoutId);
+      if (abortRef.current === controller) {
+        abortRef.current = null;
+        setLoading(false);
+        setLoadingMore(false);
+      }
     }
   }, [selectedSources, sortBy]);
 
   const loadMore = useCallback(async () => {
-    if (!searchQuery || loadingMore || !hasMore) return;
+    if (!searchQuery || loadingMore || !hasMore || !nextCursor) return;
     const nextPage = currentPage + 1;
-    await performSearch(searchQuery, nextPage, selectedSources, sortBy, true);
-  }, [searchQuery, currentPage, selectedSources, sortBy, loadingMore, hasMore, performSearch]);
+    await performSearch(searchQuery, nextPage, selectedSources, sortBy, true, nextCursor);
+  }, [searchQuery, currentPage, selectedSources, sortBy, loadingMore, hasMore, nextCursor, performSearch]);
 
   return {
     images,
@@ -0,0 +1,124 @@
+import asyncio
+import os
+import sys
+
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from services import providers  # noqa: E402
+from services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, circuit_breakers  # noqa: E402
+from services.hedging import hedging_policy  # noqa: E402
+from services.latency_tracker import latency_tracker  # noqa: E402
+from services.provider_call import ProviderError  # noqa: E402
+from services.rate_limiter import rate_limiter  # noqa: E402
+
+SLOW_S = 0.05
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    breaker = CircuitBreaker('tyba')
+    monkeypatch.setattr(breaker.settings, 'circuit_failure_threshold', 3)
+    monkeypatch.setattr(breaker.settings, 'circuit_open_seconds', 30.0)
+    return breaker
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    """_fetch_and_store com uma fonte falsa: `behaviour` decide se ela demora ou falha"""
+    behaviour = {'sleep': 10.0, 'error': None}
+
+    async def fetch_provider(source, query, page, per_page, order_by):
+        await asyncio.sleep(behaviour['sleep'])
+        if behaviour['error'] is not None:
+            raise ProviderError(source, behaviour['error'])
+        return []
+
+    async def acquire(source):
+        pass
+
+    monkeypatch.setattr(providers, 'fetch_provider', fetch_provider)
+    monkeypatch.setattr(rate_limiter, 'acquire', acquire)
+    monkeypatch.setattr(hedging_policy, 'delay_for', lambda source: None)
+    monkeypatch.setattr(latency_tracker, 'slow_threshold', lambda source: SLOW_S)
+    monkeypatch.setattr(circuit_breakers, '_breakers', {})
+    return behaviour
+
+
+def _call(cancel_after: float = None):
+    async def run():
+        task = asyncio.ensure_future(providers._fetch_and_store('tyba', 'key', 'gato', 1, 10, 'relevant'))
+        if cancel_after is not None:
+            await asyncio.sleep(cancel_after)
+            task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    asyncio.run(run())
+    return circuit_breakers.get('tyba')
+
+
+def test_opens_after_consecutive_failures(breaker):
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == CLOSED and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+
+def test_half_open_lets_a_single_probe_through(breaker):
+    for _ in range(3):
+        breaker.record_failure()
+    breaker.opened_at -= breaker.settings.circuit_open_seconds
+
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+    # Sonda que nem chegou a sair libera a vaga
+    breaker.release()
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.consecutive_failures == 0
+
+
+def test_half_open_probe_failure_reopens(breaker):
+    for _ in range(3):
+        breaker.record_failure()
+    breaker.opened_at -= breaker.settings.circuit_open_seconds
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN and not breaker.allow()
+
+
+def test_short_cancel_is_not_a_failure(provider):
+    # deadline_ms curto do cliente ou desconexão: a fonte não tem culpa
+    breaker = _call(cancel_after=SLOW_S / 5)
+    assert breaker.state == CLOSED
+    assert breaker.consecutive_failures == 0 and breaker.error_rate == 0
+
+
+def test_cancel_after_slow_threshold_counts_as_failure(provider):
+    # Fonte travada: o prazo da busca cancela antes do timeout do serviço
+    breaker = _call(cancel_after=SLOW_S * 3)
+    assert breaker.consecutive_failures == 1
+
+
+def test_hanging_provider_opens_the_breaker(provider):
+    for _ in range(providers.get_settings().circuit_failure_threshold):
+        breaker = _call(cancel_after=SLOW_S * 2)
+    assert breaker.state == OPEN
+
+
+def test_provider_timeout_counts_as_failure(provider):
+    provider.update(sleep=0, error=httpx.ReadTimeout('timeout'))
+    breaker = _call()
+    assert breaker.consecutive_failures == 1
+
+
+def test_short_cancel_releases_the_half_open_probe(provider):
+    breaker = circuit_breakers.get('tyba')
+    breaker.state = HALF_OPEN
+    _call(cancel_after=SLOW_S / 5)
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
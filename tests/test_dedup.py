@@ -0,0 +1,54 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from schemas import ImageSource  # noqa: E402
+from services.dedup import dedupe  # noqa: E402
+
+
+def _image(source: str, image_id: str, regular_url: str, raw_url=None, download_url=None, source_url='') -> ImageSource:
+    return ImageSource(title=image_id, thumbnail_url=regular_url, regular_url=regular_url, raw_url=raw_url,
+                       source=source, source_url=source_url, download_url=download_url or regular_url,
+                       license='free', image_id=image_id)
+
+
+def test_same_photo_from_two_providers_collapses():
+    pexels_url = 'https://images.pexels.com/photos/1/pexels-photo-1.jpeg'
+    # Adapters repetem a URL em vários campos (Pexels: raw == download; Google: regular == download)
+    pexels = _image('pexels', '1', f"{pexels_url}?w=940", raw_url=pexels_url, download_url=pexels_url,
+                    source_url='https://www.pexels.com/photo/1/')
+    other = _image('pexels', '2', 'https://images.pexels.com/photos/2/pexels-photo-2.jpeg')
+    google = _image('google', 'g1', f"{pexels_url}?auto=compress", source_url='https://example.com/post')
+
+    unique, removed = dedupe({'pexels': [pexels, other], 'google': [google]}, ['pexels', 'google'])
+
+    assert removed == 1
+    assert unique['google'] == []
+    kept = unique['pexels'][0]
+    assert [ref.source for ref in kept.sources] == ['pexels', 'google']
+    assert unique['pexels'][1].sources is None
+
+
+def test_openverse_and_google_collapse_on_wikimedia_thumb():
+    original = 'https://upload.wikimedia.org/wikipedia/commons/a/ab/Ipe.jpg'
+    thumb = 'https://upload.wikimedia.org/wikipedia/commons/thumb/a/ab/Ipe.jpg/640px-Ipe.jpg'
+    openverse = _image('creative_commons', 'ov1', original, raw_url=original, download_url=original)
+    google = _image('google', 'g1', thumb)
+
+    unique, removed = dedupe({'creative_commons': [openverse], 'google': [google]}, ['creative_commons', 'google'])
+
+    assert removed == 1
+    assert unique['google'] == []
+
+
+def test_url_shared_by_several_images_of_a_batch_is_not_identity():
+    # URL de fallback (ex.: página da busca) repetida em todo o lote não pode juntar imagens diferentes
+    fallback = 'https://example.org/search'
+    images = [_image('inpe', str(i), f"https://example.org/img/{i}.jpg", source_url=fallback) for i in range(3)]
+    google = _image('google', 'g1', 'https://other.org/x.jpg', source_url=fallback)
+
+    unique, removed = dedupe({'inpe': images, 'google': [google]}, ['inpe', 'google'])
+
+    assert removed == 0
+    assert len(unique['inpe']) == 3 and len(unique['google']) == 1
@@ -0,0 +1,57 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from services import providers  # noqa: E402
+from services.latency_tracker import LatencyTracker, latency_tracker  # noqa: E402
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    settings = latency_tracker.settings
+    monkeypatch.setattr(settings, 'latency_min_samples', 5)
+    monkeypatch.setattr(settings, 'slow_call_threshold_s', 0.05)
+    monkeypatch.setattr(settings, 'adaptive_timeout_min', 0.01)
+    return settings
+
+
+def test_censored_samples_never_pull_percentiles_down(settings):
+    tracker = LatencyTracker()
+    # Sem amostras: só o que passou do limiar de lentidão entra
+    tracker.record_censored('tyba', 0.01)
+    tracker.record_censored('tyba', 0.2)
+    assert tracker.snapshot()['tyba']['samples'] == 1
+
+    for seconds in (0.1, 0.1, 0.3, 0.3):
+        tracker.record('tyba', seconds)
+    # Com amostras suficientes o piso é a mediana
+    tracker.record_censored('tyba', 0.15)
+    tracker.record_censored('tyba', 0.25)
+    assert tracker.snapshot()['tyba']['samples'] == 6
+
+
+def test_provider_that_always_misses_the_deadline_gets_an_adaptive_timeout(settings, monkeypatch):
+    class Hanging:
+        async def search_images(self, query, page, per_page, *args):
+            await asyncio.sleep(10)
+
+    monkeypatch.setitem(providers.PROVIDERS, 'tyba', providers.PROVIDERS['tyba']._replace(service=Hanging()))
+    monkeypatch.setattr(latency_tracker, '_windows', {})
+
+    async def search():
+        # O prazo da busca cancela a chamada antes do timeout do serviço
+        task = asyncio.ensure_future(providers.fetch_provider('tyba', 'gato', 1, 10, 'relevant'))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    for _ in range(settings.latency_min_samples):
+        asyncio.run(search())
+
+    timeout = latency_tracker.timeout_for('tyba', 10.0)
+    assert timeout < 10.0
+    assert timeout >= 0.1
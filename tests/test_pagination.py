@@ -0,0 +1,132 @@
+import asyncio
+import base64
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from schemas import ImageSource  # noqa: E402
+from services import pagination, search_orchestrator  # noqa: E402
+from services.allocation import allocate, allocation_stats  # noqa: E402
+from services.pagination import InvalidCursorError, SearchCursor, plan_page  # noqa: E402
+from services.provider_call import ProviderError  # noqa: E402
+from services.search_orchestrator import gather_search, iter_plan  # noqa: E402
+
+
+PAGE_SIZE = 20
+
+
+def _image(source: str, position: int) -> ImageSource:
+    return ImageSource(title=f"{source} {position}", thumbnail_url='', regular_url=f"https://{source}.test/{position}.jpg",
+                       source=source, source_url='', download_url='', license='free', image_id=str(position))
+
+
+@pytest.fixture
+def catalog(monkeypatch):
+    """Fontes falsas com um número fixo de itens, paginadas como a API real"""
+    sizes = {}
+    failing = set()
+
+    async def search_provider(source, query, page, per_page, order_by):
+        if source in failing:
+            raise ProviderError(source, RuntimeError('down'))
+        start = (page - 1) * per_page
+        return [_image(source, position) for position in range(start, min(start + per_page, sizes[source]))]
+
+    monkeypatch.setattr(pagination, 'search_provider', search_provider)
+    monkeypatch.setattr(pagination, 'upstream_page_size', lambda source: PAGE_SIZE)
+    monkeypatch.setattr(search_orchestrator, 'is_configured', lambda source: True)
+    monkeypatch.setattr(allocation_stats, 'weight', lambda source: 1.0)
+    return sizes, failing
+
+
+def _page(sources, cursor, per_page=10, query='gato'):
+    # Como em server.plan_search: fontes esgotadas saem do plano e aparecem como "skipped"
+    skip = {source: 'exhausted' for source in sources if source in cursor.exhausted}
+
+    async def run():
+        plan = plan_page(cursor, sources, per_page)
+        results, statuses = await gather_search(iter_plan(sources, plan, query, 'relevant', 5000, skip))
+        return plan, results, statuses
+    return asyncio.run(run())
+
+
+def test_allocate_splits_by_weight_with_floor():
+    assert allocate(10, {'a': 1.0, 'b': 1.0}) == {'a': 5, 'b': 5}
+    shares = allocate(10, {'a': 3.0, 'b': 1.0, 'c': 0.05})
+    assert sum(shares.values()) == 10
+    assert shares['c'] == 1 and shares['a'] > shares['b']
+
+
+def test_allocate_fewer_items_than_sources_goes_to_heaviest():
+    assert allocate(2, {'a': 0.1, 'b': 0.9, 'c': 0.5}) == {'a': 0, 'b': 1, 'c': 1}
+    assert allocate(0, {'a': 1.0}) == {'a': 0}
+    assert allocate(5, {}) == {}
+
+
+def test_cursor_roundtrip():
+    cursor = SearchCursor({'unsplash': 25, 'pexels': 0}, {'google'})
+    decoded = SearchCursor.decode(cursor.encode('Gato ', 'latest'), 'gato', 'latest')
+    assert decoded.offsets == {'unsplash': 25}
+    assert decoded.exhausted == {'google'}
+
+
+def test_cursor_rejects_other_search_and_tampering():
+    encoded = SearchCursor({'unsplash': 25}).encode('gato', 'relevant')
+    with pytest.raises(InvalidCursorError):
+        SearchCursor.decode(encoded, 'cachorro', 'relevant')
+    with pytest.raises(InvalidCursorError):
+        SearchCursor.decode(encoded, 'gato', 'latest')
+    with pytest.raises(InvalidCursorError):
+        SearchCursor.decode('não é base64!', 'gato', 'relevant')
+
+    payload = json.loads(base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)))
+    payload['o']['unsplash'] = -5
+    tampered = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+    with pytest.raises(InvalidCursorError):
+        SearchCursor.decode(tampered, 'gato', 'relevant')
+
+
+def test_short_source_is_topped_up_without_skips_or_repeats(catalog):
+    sizes, _ = catalog
+    sizes.update({'unsplash': 7, 'pexels': 50})
+    sources = ['unsplash', 'pexels']
+    seen = {source: [] for source in sources}
+    cursor = SearchCursor()
+
+    # Página 1: 5 + 5; página 2: unsplash só tem 2 e o top-up pede os 3 que faltam ao pexels
+    for expected in ({'unsplash': 5, 'pexels': 5}, {'unsplash': 2, 'pexels': 8}):
+        plan, results, statuses = _page(sources, cursor)
+        assert {source: len(results.get(source, [])) for source in sources} == expected
+        assert all(status.status == 'ok' for status in statuses.values())
+        for source in sources:
+            seen[source].extend(int(image.image_id) for image in results.get(source, []))
+        cursor = SearchCursor.decode(plan.next_cursor('gato', 'relevant'), 'gato', 'relevant')
+
+    assert cursor.exhausted == {'unsplash'}
+    # Janela [13, 23) do pexels: atravessa a fronteira entre as páginas upstream 1 e 2
+    plan, results, statuses = _page(sources, cursor)
+    assert statuses['unsplash'].status == 'skipped' and not results['unsplash']
+    assert len(results['pexels']) == 10
+    seen['pexels'].extend(int(image.image_id) for image in results['pexels'])
+
+    assert seen['unsplash'] == list(range(7))
+    assert seen['pexels'] == list(range(23))
+
+
+def test_failed_source_does_not_advance(catalog):
+    sizes, failing = catalog
+    sizes.update({'unsplash': 100, 'pexels': 100})
+    failing.add('pexels')
+
+    plan, results, statuses = _page(['unsplash', 'pexels'], SearchCursor({'pexels': 12}))
+
+    assert statuses['pexels'].status == 'error'
+    # A parte do pexels é redistribuída para o unsplash no top-up; o pexels continua de onde estava
+    assert [int(image.image_id) for image in results['unsplash']] == list(range(10))
+    cursor = SearchCursor.decode(plan.next_cursor('gato', 'relevant'), 'gato', 'relevant')
+    assert cursor.offsets == {'unsplash': 10, 'pexels': 12}
+    assert cursor.exhausted == set()
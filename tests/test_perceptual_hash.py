@@ -0,0 +1,107 @@
+import asyncio
+import functools
+import os
+import sys
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+pytest.importorskip('PIL')
+from PIL import Image  # noqa: E402
+from schemas import ImageSource  # noqa: E402
+from services.http_client import http_client  # noqa: E402
+from services.perceptual_hash import PerceptualHasher, hamming_matrix  # noqa: E402
+
+
+def _photo(seed: int) -> Image.Image:
+    rng = np.random.default_rng(seed)
+    # Blocos grandes suavizados: estrutura de baixa frequência, como uma foto
+    blocks = rng.integers(0, 255, size=(6, 8, 3), dtype=np.uint8)
+    return Image.fromarray(blocks).resize((320, 240), Image.BICUBIC)
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def thumbnail_server(tmp_path_factory):
+    """Miniaturas de fixture servidas por um servidor HTTP local"""
+    root = tmp_path_factory.mktemp('thumbnails')
+    original = _photo(1)
+    original.save(root / 'original.jpg', quality=90)
+    # Mesma foto recodificada por outro banco: outra qualidade e outro tamanho
+    original.resize((200, 150), Image.LANCZOS).save(root / 'reencoded.jpg', quality=40)
+    _photo(2).save(root / 'other.jpg', quality=90)
+    (root / 'broken.jpg').write_bytes(b'not an image')
+
+    handler = functools.partial(_QuietHandler, directory=str(root))
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def _image(source: str, image_id: str, thumbnail_url: str) -> ImageSource:
+    return ImageSource(title=image_id, thumbnail_url=thumbnail_url, regular_url=f"https://{source}.example/{image_id}.jpg",
+                       source=source, source_url=f"https://{source}.example/{image_id}", download_url='',
+                       license='free', image_id=image_id)
+
+
+def test_hamming_matrix():
+    distances = hamming_matrix([0b1011, 0b0011, 0b1011])
+    assert distances.tolist() == [[0, 1, 0], [1, 0, 1], [0, 1, 0]]
+
+
+@pytest.mark.parametrize('algorithm', ['dhash', 'phash'])
+def test_collapse_reencoded_copy(thumbnail_server, algorithm):
+    hasher = PerceptualHasher()
+    hasher.settings = hasher.settings.model_copy(update={'phash_algorithm': algorithm})
+    results = {
+        'pexels': [_image('pexels', 'a', f"{thumbnail_server}/original.jpg"),
+                   _image('pexels', 'b', f"{thumbnail_server}/other.jpg")],
+        'fotoarena': [_image('fotoarena', 'c', f"{thumbnail_server}/reencoded.jpg"),
+                      _image('fotoarena', 'd', f"{thumbnail_server}/broken.jpg")]
+    }
+
+    async def run():
+        try:
+            await hasher.start()
+            first = await hasher.collapse(results, ['pexels', 'fotoarena'])
+            second = await hasher.collapse(results, ['pexels', 'fotoarena'])
+            return first, second
+        finally:
+            await http_client.close()
+            hasher.close()
+
+    (collapsed, removed), (_, removed_again) = asyncio.run(run())
+
+    assert removed == 1 and removed_again == 1
+    assert [image.image_id for image in collapsed['pexels']] == ['a', 'b']
+    # A imagem quebrada não tem hash e é mantida
+    assert [image.image_id for image in collapsed['fotoarena']] == ['d']
+    assert [ref.source for ref in collapsed['pexels'][0].sources] == ['pexels', 'fotoarena']
+    assert collapsed['pexels'][1].sources is None
+    # A segunda passada veio toda do cache de hashes por URL
+    assert hasher.stats()['cache_hits'] == 4
+
+
+def test_download_stops_at_size_cap(thumbnail_server):
+    hasher = PerceptualHasher()
+    hasher.settings = hasher.settings.model_copy(update={'phash_max_source_bytes': 100})
+
+    async def run():
+        try:
+            await http_client.start()
+            return await hasher.hash_url(f"{thumbnail_server}/original.jpg")
+        finally:
+            await http_client.close()
+
+    assert asyncio.run(run()) is None
+    assert hasher.stats()['too_large'] == 1 and hasher.stats()['computed'] == 0
@@ -0,0 +1,94 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from services.singleflight import SingleFlight  # noqa: E402
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return 'ok'
+
+    async def run():
+        return await asyncio.gather(*[flight.do('key', fetch) for _ in range(5)])
+
+    assert asyncio.run(run()) == ['ok'] * 5
+    assert len(calls) == 1
+    assert flight.stats()['coalesced'] == 4 and flight.stats()['in_flight'] == 0
+
+
+def test_caller_arriving_while_abandoned_flight_cleans_up_starts_fresh():
+    flight = SingleFlight()
+    started = []
+
+    async def fetch():
+        started.append(1)
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            # Limpeza que ainda espera (como o httpx fechando a conexão)
+            await asyncio.sleep(0.05)
+            raise
+        return 'late'
+
+    async def quick():
+        return 'fresh'
+
+    async def run():
+        a = asyncio.ensure_future(flight.do('key', fetch))
+        await asyncio.sleep(0.01)
+        a.cancel()
+        await asyncio.sleep(0)
+        # O voo abandonado ainda está terminando; este chamador nunca foi cancelado
+        b = asyncio.ensure_future(flight.do('key', quick))
+        result = await b
+        await asyncio.gather(a, return_exceptions=True)
+        await asyncio.sleep(0.1)
+        return a.cancelled(), result
+
+    a_cancelled, result = asyncio.run(run())
+    assert a_cancelled
+    assert result == 'fresh'
+    # O done-callback do voo antigo não pode remover o voo novo
+    assert flight.stats()['in_flight'] == 0 and flight.stats()['executed'] == 2
+
+
+def test_done_callback_of_old_flight_keeps_the_new_one():
+    flight = SingleFlight()
+    release = None
+
+    async def slow_cleanup():
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            await asyncio.sleep(0.05)
+            raise
+
+    async def waiting():
+        await release.wait()
+        return 'new'
+
+    async def run():
+        nonlocal release
+        release = asyncio.Event()
+        a = asyncio.ensure_future(flight.do('key', slow_cleanup))
+        await asyncio.sleep(0.01)
+        a.cancel()
+        await asyncio.sleep(0)
+        b = asyncio.ensure_future(flight.do('key', waiting))
+        # O voo antigo termina de limpar enquanto o novo ainda está em andamento
+        await asyncio.sleep(0.1)
+        c = asyncio.ensure_future(flight.do('key', waiting))
+        await asyncio.sleep(0)
+        release.set()
+        return await asyncio.gather(b, c)
+
+    assert asyncio.run(run()) == ['new', 'new']
+    assert flight.stats()['executed'] == 2 and flight.stats()['coalesced'] == 1
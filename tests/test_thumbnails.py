@@ -0,0 +1,46 @@
+import io
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+pytest.importorskip('PIL')
+from PIL import Image  # noqa: E402
+from services.thumbnails import ThumbnailStore, downscale  # noqa: E402
+
+
+def _encoded(width: int, height: int, format: str) -> bytes:
+    pixels = np.random.default_rng(width).integers(0, 255, size=(height, width, 3), dtype=np.uint8)
+    output = io.BytesIO()
+    Image.fromarray(pixels).save(output, format)
+    return output.getvalue()
+
+
+def test_downscale():
+    large = downscale(_encoded(1200, 900, 'PNG'), 400, 80)
+    assert Image.open(io.BytesIO(large)).size == (400, 300)
+    small_jpeg = _encoded(300, 200, 'JPEG')
+    # JPEG que já cabe na largura volta intacto
+    assert downscale(small_jpeg, 400, 80) == small_jpeg
+    assert downscale(b'not an image', 400, 80) is None
+
+
+def test_store_is_content_addressed_and_bounded(tmp_path):
+    store = ThumbnailStore(str(tmp_path), max_bytes=2500)
+    path_a, digest_a = store.store('ref-a', b'a' * 1000)
+    # Mesmo conteúdo por outra URL: um único blob
+    assert store.store('ref-b', b'a' * 1000) == (path_a, digest_a)
+    assert store.total_bytes == 1000
+
+    store.store('ref-c', b'c' * 1000)
+    os.utime(path_a, (1, 1))
+    store.lookup('ref-c')
+    # Passou do limite: sai o blob menos usado e as refs que apontavam para ele
+    store.store('ref-d', b'd' * 1000)
+    assert store.total_bytes <= 2500 * 0.9
+    assert not os.path.exists(path_a)
+    assert store.lookup('ref-a') is None and store.lookup('ref-b') is None
+    assert store.lookup('ref-c') is not None and store.lookup('ref-d') is not None